@@ -1,25 +1,20 @@
 import streamlit as st
-import pandas as pd
-from Model import bersihkan_data
+import aset
+import pekerjaan
+from cache import dipakai_bersama
+from ingest import ukuran_memori
+from memo import jejak_memori_session
 import os
 
 # Konfigurasi halaman
-st.set_page_config(
-    page_title="Qaraa Segmentation App",
-    page_icon="assets/favicon.png",
-    layout="wide"
-)
-
-# Load CSS
-def load_css(file_path):
-    with open(file_path) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+aset.konfigurasi_halaman("Qaraa Segmentation App")
 
-load_css("assets/style_qaraa.css")
+# Load CSS (dibaca sekali per proses, lihat aset.py)
+aset.pasang_css()
 
 # Sidebar
 with st.sidebar:
-    st.image("assets/favicon.png", width=150)
+    st.image(aset.favicon(), width=150)
     st.markdown("**Qaraa Segmentation App**")
 
 # Header
@@ -43,64 +38,125 @@ st.caption("Gunakan salah satu: upload file CSV Anda, **atau** klik tombol untuk
 
 # Contoh format file
 st.markdown("### 📥 Contoh Format File Transaksi yang Diterima")
-with open("assets/sample_transaksi.csv", "rb") as file:
-    st.download_button(
-        label="📥 Download Contoh File CSV",
-        data=file,
-        file_name="contoh_transaksi.csv",
-        mime="text/csv"
-    )
+st.download_button(
+    label="📥 Download Contoh File CSV",
+    data=aset.contoh_csv(),
+    file_name="contoh_transaksi.csv",
+    mime="text/csv"
+)
     
 # ==========================================================
 # Proses Data: Upload ATAU Dataset Internal
 # ==========================================================
 df_raw = None
+df_clean = None
 source_label = None
+sumber = None
+sumber_id = None
 
 if uploaded_file is not None:
-    try:
-        df_raw = pd.read_csv(uploaded_file)
-        source_label = f"📤 Sumber: Upload ({uploaded_file.name})"
-    except Exception as e:
-        st.error(f"Gagal membaca file upload: {e}")
+    sumber = uploaded_file
+    sumber_id = f"upload:{uploaded_file.file_id}"
+    source_label = f"📤 Sumber: Upload ({uploaded_file.name})"
 
 elif use_internal:
     if os.path.exists(INTERNAL_PATH):
-        try:
-            df_raw = pd.read_csv(INTERNAL_PATH)
-            source_label = f"📄 Sumber: Dataset Internal (DATASET PT. KREASI PUTRA HOTAMA 2025 - hasil_merge.csv)"
-        except Exception as e:
-            st.error(f"Gagal membaca dataset internal: {e}")
+        sumber = INTERNAL_PATH
+        sumber_id = f"internal:{os.path.getmtime(INTERNAL_PATH)}"
+        source_label = f"📄 Sumber: Dataset Internal (DATASET PT. KREASI PUTRA HOTAMA 2025 - hasil_merge.csv)"
     else:
         st.error("File dataset internal tidak ditemukan di folder assets/. Pastikan nama & lokasi file benar.")
 
+# Baca + bersihkan + RFM jalan di latar belakang (pekerjaan.py, pakai cache Parquet).
+# Input baru -> pekerjaan lama dibatalkan; rerun dengan input yang sama tidak mengulang.
+job = st.session_state.get("pekerjaan")
+if sumber is not None and (job is None or job.sumber_id != sumber_id):
+    if job is not None:
+        job.batal()
+    for key in ["data_bersih", "data_key", "df_rfm_segment"]:
+        st.session_state.pop(key, None)
+    slot = st.session_state.setdefault("slot_pekerjaan", pekerjaan.slot_sesi())
+    job = pekerjaan.mulai(sumber, sumber_id, source_label, slot)
+    st.session_state["pekerjaan"] = job
+
+
+@st.fragment(run_every=0.5)
+def progres_pekerjaan():
+    # Hanya fragment ini yang di-rerun tiap 0.5 dtk; halaman penuh di-rerun saat selesai
+    job = st.session_state["pekerjaan"]
+    if job.selesai:
+        st.rerun()
+    st.progress(job.progres, text=f"⏳ Memproses data... ({job.label})")
+    st.dataframe(job.tabel_status(), use_container_width=True, hide_index=True)
+    if st.button("⛔ Batalkan", key=f"batal_{job.id}"):
+        job.batal()
+
+
+if job is not None and not job.selesai:
+    progres_pekerjaan()
+elif job is not None and job.dibatalkan:
+    st.warning("Pemuatan data dibatalkan.")
+elif job is not None and not job.berhasil:
+    st.error(f"Gagal membaca / membersihkan data: {job.error}")
+elif job is not None:
+    df_raw = job.data_mentah()
+    df_clean = job.hasil["bersih"]
+    df_laporan = job.hasil["laporan"]
+    source_label = job.label
+    st.session_state["data_key"] = job.hasil["key"]
+
 # ==========================================================
 # Tampilkan Hasil & Simpan ke Session
 # ==========================================================
-if df_raw is not None:
+if df_clean is not None:
     try:
-        df_clean = bersihkan_data(df_raw)
-
-        st.session_state["data_awal"] = df_raw
+        # Data mentah cukup ditampilkan di sini, yang disimpan di session hanya data bersih (kompak)
         st.session_state["data_bersih"] = df_clean
 
         st.success("✅ Data berhasil dimuat dan dibersihkan!")
         if source_label:
             st.caption(source_label)
+        with st.expander("⏱️ Tahap pemuatan"):
+            st.dataframe(job.tabel_status(), use_container_width=True, hide_index=True)
         st.markdown("👉 Lanjut ke menu **RFM Analysis** dan **RFM Insights** di sidebar.")
 
+        # Tambah ke histori multi-tahun (halaman Gudang Transaksi); batch yang sama tidak dobel
+        if st.button("💾 Simpan ke gudang transaksi"):
+            import gudang
+
+            hasil_simpan = gudang.simpan_transaksi(df_clean)
+            if hasil_simpan['baris']:
+                st.success(f"Tersimpan {hasil_simpan['baris']:,} baris ke {len(hasil_simpan['bulan'])} partisi bulan "
+                           f"(batch {hasil_simpan['batch']}).")
+            if hasil_simpan['dilewati']:
+                st.info(f"{hasil_simpan['dilewati']:,} baris sudah ada di gudang, tidak disimpan ulang.")
+
+        memori = jejak_memori_session()
+        if dipakai_bersama(df_clean):
+            st.caption(f"💾 Memori session: **{sum(memori.values()):.1f} MB** "
+                       f"(dataset internal {ukuran_memori(df_clean) / 1e6:.1f} MB dipakai bersama semua session)")
+        else:
+            ukuran_raw = f"{ukuran_memori(df_raw) / 1e6:.1f} MB" if df_raw is not None else "-"
+            st.caption(f"💾 Memori session: **{sum(memori.values()):.1f} MB** "
+                       f"(data mentah {ukuran_raw}, tidak disimpan di session)")
+
+        baris_raw = len(df_raw) if df_raw is not None else job.hasil.get("baris_raw", len(df_clean))
         with st.expander("🔍 Lihat Data Asli (Raw)"):
-            st.dataframe(df_raw, use_container_width=True, height=400)
-            st.markdown(f"📦 Jumlah data awal: **{len(df_raw)}** baris")
+            if df_raw is not None:
+                st.dataframe(df_raw, use_container_width=True, height=400)
+            else:
+                st.info("Data mentah sudah dihapus dari cache server; upload ulang untuk melihatnya.")
+            st.markdown(f"📦 Jumlah data awal: **{baris_raw}** baris")
 
         with st.expander("✅ Lihat Data Bersih (Siap Olah)"):
             st.dataframe(df_clean, use_container_width=True, height=400)
             st.markdown(f"🧹 Jumlah data setelah dibersihkan: **{len(df_clean)}** baris")
-            st.markdown(f"❌ Data yang dibuang: **{len(df_raw) - len(df_clean)}** baris")
+            st.markdown(f"❌ Data yang dibuang: **{baris_raw - len(df_clean)}** baris")
+            st.dataframe(df_laporan, use_container_width=True, hide_index=True)
 
     except Exception as e:
         st.error(f"Terjadi kesalahan saat membersihkan data: {e}")
-else:
+elif job is None or job.dibatalkan:
     st.info("Silakan **upload CSV** atau **pakai dataset internal** untuk mulai.")
 
 st.markdown("<hr>", unsafe_allow_html=True)
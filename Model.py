@@ -1,38 +1,192 @@
+import operator
+
 import pandas as pd
 import numpy as np
 
+from profil import instrumen, tahap
+
 # 1) Data Cleaning
-def bersihkan_data(df):
+@instrumen
+def _bersihkan(df, order_id_awal=None):
     # Bersihkan harga ke numerik
-    df['Price_clean'] = (
-        df['Price'].astype(str)
-        .str.replace('Rp', '', regex=False)
-        .str.replace('.', '', regex=False)
-        .str.replace(',', '.', regex=False)
-        .str.strip()
-    )
-    df['Price_clean'] = pd.to_numeric(df['Price_clean'], errors='coerce')
+    with tahap("parse harga (Rp -> angka)", len(df)):
+        df['Price_clean'] = (
+            df['Price'].astype(str)
+            .str.replace('Rp', '', regex=False)
+            .str.replace('.', '', regex=False)
+            .str.replace(',', '.', regex=False)
+            .str.strip()
+        )
+        df['Price_clean'] = pd.to_numeric(df['Price_clean'], errors='coerce')
 
     # Normalisasi kolom penting
-    df['Order_id'] = df['Order_id'].fillna(method='ffill')
-    df['Order_date'] = pd.to_datetime(df['Order_date'], errors='coerce')
+    # order_id_awal: Order_id terakhir dari chunk sebelumnya (mode streaming)
+    df['Order_id'] = df['Order_id'].ffill()
+    if order_id_awal is not None:
+        df['Order_id'] = df['Order_id'].fillna(order_id_awal)
+    with tahap("parse Order_date", len(df)):
+        df['Order_date'] = pd.to_datetime(df['Order_date'], errors='coerce')
 
     # Drop baris invalid
     df = df.dropna(subset=['Customer_id', 'Order_date', 'Price_clean']).copy()
 
     # Customer_id jadi string tanpa ".0"
-    df['Customer_id'] = df['Customer_id'].astype(float).astype(int).astype(str)
+    with tahap("Customer_id float -> int -> str", len(df)):
+        df['Customer_id'] = df['Customer_id'].astype(float).astype(int).astype(str)
 
     # Total transaksi
     df['Total_Transaksi'] = df['Quantity'] * df['Price_clean']
     df = df[df['Total_Transaksi'] > 0]
+    return df
+
+
+@instrumen
+def bersihkan_data(df):
+    df = _bersihkan(df)
 
     # Simpan untuk download
     df.to_csv("assets/data_bersih.csv", index=False)
     return df
 
+
+# 1b) Data Cleaning (streaming, per chunk)
+# Untuk file yang lebih besar dari RAM: dibaca & ditulis per chunk,
+# jadi memori hanya sebesar satu chunk, bukan sebesar file.
+# rfm_state (StateRFM, lihat 2b): tiap chunk bersih langsung di-fold ke state RFM,
+# jadi RFM file besar didapat tanpa pernah memuat data bersih utuh (batch.py --inkremental).
+# output_path=None (default): hasil bersih tidak ditulis ke disk, hanya ringkasan + state.
+@instrumen
+def bersihkan_data_stream(sumber, output_path=None, chunksize=100_000, rfm_state=None):
+    baris_awal = 0
+    baris_bersih = 0
+    order_id_terakhir = None
+    header = True
+
+    for chunk in pd.read_csv(sumber, chunksize=chunksize):
+        baris_awal += len(chunk)
+
+        # ffill Order_id harus nyambung antar chunk, jadi simpan nilai
+        # terakhir (sebelum baris invalid di-drop) untuk chunk berikutnya
+        carry = chunk['Order_id'].dropna()
+        chunk = _bersihkan(chunk, order_id_awal=order_id_terakhir)
+        if len(carry):
+            order_id_terakhir = carry.iloc[-1]
+
+        if output_path is not None:
+            chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        if rfm_state is not None:
+            perbarui_rfm_state(rfm_state, chunk)
+        baris_bersih += len(chunk)
+
+    return {'baris_awal': baris_awal, 'baris_bersih': baris_bersih, 'output': output_path,
+            'rfm_state': rfm_state}
+
+# 1c) Merge multi-file export (pengganti inner join Data.csv x Data2.csv di notebook)
+# Export "Data" berisi Customer_id, export "Data2" berisi Customer_name; keduanya
+# di-join lewat 6 kolom. Kolom join di-hash jadi satu uint64 per baris (+ nomor
+# kemunculan untuk baris kembar), jadi merge cukup di 2 kolom integer.
+# File dibaca paralel, baris yang muncul di lebih dari satu file (export bulanan
+# yang overlap) dibuang, dan hit rate join dilaporkan.
+KOLOM_JOIN = ['Order_id', 'Product_code', 'Product_Name', 'Quantity', 'Order_date', 'Price']
+KOLOM_MERGE = ['Customer_name', 'Customer_id'] + KOLOM_JOIN
+
+
+def _key_join(df):
+    from ingest import parse_rupiah
+
+    # Normalisasi dulu supaya "0:42:25" == "00:42:25", 1 == 1.0, "Rp 10.000" == "10000",
+    # spasi di ujung diabaikan. Harga yang tidak bisa diparse tetap dibandingkan sebagai teks.
+    harga = parse_rupiah(df['Price'])
+    kunci = pd.DataFrame({
+        'Order_id': df['Order_id'].astype(str).str.strip(),
+        'Product_code': pd.to_numeric(df['Product_code'], errors='coerce').astype('float64'),
+        'Product_Name': df['Product_Name'].astype(str).str.strip(),
+        'Quantity': pd.to_numeric(df['Quantity'], errors='coerce').astype('float64'),
+        'Order_date': df['Order_date'],
+        'Price': harga.astype('float64'),
+        'Price_teks': df['Price'].astype(str).str.strip().where(harga.isna(), ''),
+    })
+    return pd.util.hash_pandas_object(kunci, index=False).to_numpy()
+
+
+@instrumen
+def _baca_export(sumber):
+    from ingest import baca_transaksi, parse_tanggal
+
+    df = baca_transaksi(sumber)
+    df.columns = df.columns.str.strip()
+    df['Order_date'] = parse_tanggal(df['Order_date'])
+    df['_key'] = _key_join(df)
+    # Baris identik dalam satu file tetap dihitung terpisah (bukan cross join)
+    df['_urutan'] = df.groupby('_key').cumcount()
+    return df
+
+
+def _gabung_export(list_df):
+    df = pd.concat(list_df, ignore_index=True)
+    n = len(df)
+    df = df.drop_duplicates(subset=['_key', '_urutan'], keep='first')
+    return df, n - len(df)
+
+
+@instrumen
+def merge_transaksi(files_id, files_nama, max_workers=None):
+    from concurrent.futures import ThreadPoolExecutor
+    from ingest import _ke_int_jika_bulat
+
+    files_id, files_nama = list(files_id), list(files_nama)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        hasil = list(pool.map(_baca_export, files_id + files_nama))
+    df_id, dup_id = _gabung_export(hasil[:len(files_id)])
+    df_nama, dup_nama = _gabung_export(hasil[len(files_id):])
+
+    df_merge = df_nama[['_key', '_urutan', 'Customer_name'] + KOLOM_JOIN].merge(
+        df_id[['_key', '_urutan', 'Customer_id']],
+        on=['_key', '_urutan'], how='inner'
+    )
+
+    # Baris yang tidak punya pasangan di sisi lain
+    idx_merge = pd.MultiIndex.from_frame(df_merge[['_key', '_urutan']])
+    cocok_id = pd.MultiIndex.from_frame(df_id[['_key', '_urutan']]).isin(idx_merge)
+    cocok_nama = pd.MultiIndex.from_frame(df_nama[['_key', '_urutan']]).isin(idx_merge)
+    df_tidak_cocok = pd.concat([
+        df_id.loc[~cocok_id, ['Customer_id'] + KOLOM_JOIN].assign(Sumber='Data (Customer_id)'),
+        df_nama.loc[~cocok_nama, ['Customer_name'] + KOLOM_JOIN].assign(Sumber='Data2 (Customer_name)'),
+    ], ignore_index=True)
+
+    laporan = {
+        'file_id': len(files_id),
+        'file_nama': len(files_nama),
+        'baris_id': len(df_id),
+        'baris_nama': len(df_nama),
+        'duplikat_id': dup_id,
+        'duplikat_nama': dup_nama,
+        'baris_merge': len(df_merge),
+        'hit_rate_id': len(df_merge) / len(df_id) if len(df_id) else 0.0,
+        'hit_rate_nama': len(df_merge) / len(df_nama) if len(df_nama) else 0.0,
+        'tidak_cocok_id': int((~cocok_id).sum()),
+        'tidak_cocok_nama': int((~cocok_nama).sum()),
+    }
+    df_merge['Customer_name'] = df_merge['Customer_name'].astype(str).str.strip()
+    # Dibaca sebagai float (supaya NaN terbaca); kembalikan ke integer seperti hasil_merge asli
+    for kol in ('Customer_id', 'Quantity'):
+        df_merge[kol] = _ke_int_jika_bulat(df_merge[kol])
+    return df_merge[KOLOM_MERGE], laporan, df_tidak_cocok
+
+
 # 2) Hitung RFM
-def hitung_rfm(df_clean):
+def _lengkapi_rfm(df_agg, ref_date):
+    df_agg['Recency'] = (ref_date - df_agg['Last_Order_Date']).dt.days
+    df_agg['Avg_Transaction'] = (
+        (df_agg['Total_Transaksi'] / df_agg['Frequency'])
+        .fillna(0).round(0).astype(int)
+    )
+    return df_agg
+
+
+@instrumen
+def _hitung_rfm(df_clean):
     ref_date = df_clean['Order_date'].max()
     df_agg = df_clean.groupby('Customer_id').agg({
         'Order_id': 'count',
@@ -45,12 +199,955 @@ def hitung_rfm(df_clean):
         'Order_date': 'Last_Order_Date'
     }, inplace=True)
 
-    df_agg['Recency'] = (ref_date - df_agg['Last_Order_Date']).dt.days
-    df_agg['Avg_Transaction'] = (
-        (df_agg['Total_Transaksi'] / df_agg['Frequency'])
-        .fillna(0).round(0).astype(int)
-    )
+    return _lengkapi_rfm(df_agg, ref_date)
+
+
+@instrumen
+def hitung_rfm(df_clean):
+    df_agg = _hitung_rfm(df_clean)
 
     # Simpan untuk download
     df_agg.to_csv("assets/rfm_result.csv", index=False)
     return df_agg
+
+
+# 2b) RFM incremental
+# State per customer (Frequency, Total_Transaksi, Last_Order_Date) disimpan,
+# batch transaksi baru cukup di-"fold" ke state tanpa groupby ulang semua histori.
+# State = array NumPy berkapasitas (tumbuh 2x saat penuh) + dict Customer_id -> baris,
+# jadi tiap batch hanya menyentuh customer di batch itu: O(ukuran batch), bukan O(semua customer).
+# Recency baru dihitung saat dibutuhkan (rfm_dari_state) terhadap tanggal max terbaru.
+RFM_STATE_PATH = "assets/rfm_state.csv"
+
+
+class StateRFM:
+    def __init__(self, kapasitas=1024):
+        self.n = 0
+        self._posisi = {}
+        self._ids = np.empty(kapasitas, dtype=object)
+        self._freq = np.zeros(kapasitas, dtype='int64')
+        self._total = np.zeros(kapasitas, dtype='float64')
+        self._last = np.full(kapasitas, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    def __len__(self):
+        return self.n
+
+    def _pastikan_kapasitas(self, n_baru):
+        kapasitas = len(self._ids)
+        if n_baru <= kapasitas:
+            return
+        while kapasitas < n_baru:
+            kapasitas *= 2
+        for nama in ('_ids', '_freq', '_total', '_last'):
+            lama = getattr(self, nama)
+            baru = np.empty(kapasitas, dtype=lama.dtype)
+            baru[:self.n] = lama[:self.n]
+            setattr(self, nama, baru)
+
+    def tambah(self, ids, freq, total, last):
+        # ids unik (hasil groupby batch); customer baru dapat baris di ujung array
+        posisi = np.fromiter((self._posisi.get(c, -1) for c in ids), dtype='int64', count=len(ids))
+        baru = posisi < 0
+        n_baru = int(baru.sum())
+        if n_baru:
+            self._pastikan_kapasitas(self.n + n_baru)
+            pos_baru = np.arange(self.n, self.n + n_baru)
+            posisi[baru] = pos_baru
+            self._ids[pos_baru] = ids[baru]
+            self._freq[pos_baru] = 0
+            self._total[pos_baru] = 0
+            self._last[pos_baru] = np.datetime64('NaT')
+            self._posisi.update(zip(ids[baru], pos_baru.tolist()))
+            self.n += n_baru
+
+        self._freq[posisi] += freq
+        self._total[posisi] += total
+        lama = self._last[posisi]
+        self._last[posisi] = np.where(np.isnat(lama) | (last > lama), last, lama)
+
+    def ke_frame(self):
+        total = self._total[:self.n]
+        return pd.DataFrame({
+            'Frequency': self._freq[:self.n].copy(),
+            # Rupiah umumnya bulat: dtype sama dengan groupby-sum biasa
+            'Total_Transaksi': total.astype('int64') if (total == np.round(total)).all() else total.copy(),
+            'Last_Order_Date': self._last[:self.n].copy(),
+        }, index=pd.Index(self._ids[:self.n], name='Customer_id'))
+
+    @classmethod
+    def dari_frame(cls, df):
+        state = cls(kapasitas=max(1024, len(df)))
+        state.tambah(
+            df.index.to_numpy(dtype=object), df['Frequency'].to_numpy(dtype='int64'),
+            df['Total_Transaksi'].to_numpy(dtype='float64'),
+            df['Last_Order_Date'].to_numpy(dtype='datetime64[ns]')
+        )
+        return state
+
+
+@instrumen
+def perbarui_rfm_state(state, df_batch):
+    # state diubah di tempat (dan dikembalikan); None -> state baru
+    batch = df_batch.groupby('Customer_id').agg(
+        Frequency=('Order_id', 'count'),
+        Total_Transaksi=('Total_Transaksi', 'sum'),
+        Last_Order_Date=('Order_date', 'max')
+    )
+    if state is None:
+        state = StateRFM()
+    state.tambah(
+        batch.index.to_numpy(dtype=object), batch['Frequency'].to_numpy(dtype='int64'),
+        batch['Total_Transaksi'].to_numpy(dtype='float64'),
+        batch['Last_Order_Date'].to_numpy(dtype='datetime64[ns]')
+    )
+    return state
+
+
+@instrumen
+def rfm_dari_state(state):
+    df_agg = state.ke_frame().sort_index().rename_axis('Customer_id').reset_index()
+    ref_date = df_agg['Last_Order_Date'].max()
+    return _lengkapi_rfm(df_agg, ref_date)
+
+
+@instrumen
+def simpan_rfm_state(state, path=RFM_STATE_PATH):
+    state.ke_frame().to_csv(path)
+
+
+@instrumen
+def muat_rfm_state(path=RFM_STATE_PATH):
+    return StateRFM.dari_frame(pd.read_csv(
+        path, index_col='Customer_id', dtype={'Customer_id': str},
+        parse_dates=['Last_Order_Date']
+    ))
+
+
+# 2c) RFM multi-snapshot (rolling, mis. tiap akhir bulan)
+# Satu pass untuk semua tanggal acuan: tiap transaksi dipetakan (searchsorted) ke
+# snapshot pertama yang sudah memuatnya, diagregasi per (customer, snapshot), lalu
+# dijumlah kumulatif sepanjang snapshot. Snapshot terakhir = hasil hitung_rfm.
+def tanggal_snapshot_bulanan(df_clean):
+    # Akhir tiap bulan; bulan terakhir dipotong di Order_date max (sama dengan hitung_rfm)
+    tanggal = df_clean['Order_date']
+    akhir = pd.period_range(tanggal.min(), tanggal.max(), freq='M').to_timestamp(how='end')
+    return akhir.where(akhir < tanggal.max(), tanggal.max()).unique()
+
+
+@instrumen
+def hitung_rfm_snapshot(df_clean, ref_dates=None):
+    ref_dates = pd.DatetimeIndex(
+        tanggal_snapshot_bulanan(df_clean) if ref_dates is None else ref_dates
+    ).sort_values().unique()
+    n_snap = len(ref_dates)
+
+    kode, customer = pd.factorize(df_clean['Customer_id'], sort=True)
+    tanggal = df_clean['Order_date'].to_numpy(dtype='datetime64[ns]')
+    # Snapshot pertama yang memuat baris ini (Order_date <= ref_date)
+    snap = np.searchsorted(ref_dates.to_numpy(), tanggal, side='left')
+    masuk = snap < n_snap
+
+    sel = kode[masuk] * n_snap + snap[masuk]
+    ukuran = len(customer) * n_snap
+    frekuensi = np.bincount(sel, minlength=ukuran).reshape(-1, n_snap)
+    total = np.bincount(
+        sel, weights=df_clean['Total_Transaksi'].to_numpy(dtype='float64')[masuk], minlength=ukuran
+    ).reshape(-1, n_snap)
+    terakhir = np.full(ukuran, np.iinfo('int64').min, dtype='int64')  # = NaT
+    np.maximum.at(terakhir, sel, tanggal[masuk].view('int64'))
+    terakhir = terakhir.reshape(-1, n_snap)
+
+    # Kumulatif sepanjang snapshot (NaT = int64 min, jadi aman untuk maximum)
+    frekuensi = frekuensi.cumsum(axis=1)
+    total = total.cumsum(axis=1)
+    terakhir = np.maximum.accumulate(terakhir, axis=1)
+
+    # Long format (urut snapshot lalu Customer_id), hanya customer yang sudah
+    # punya transaksi di snapshot itu
+    idx_s, idx_c = np.nonzero(frekuensi.T)
+    df = pd.DataFrame({
+        'Snapshot': ref_dates[idx_s],
+        'Customer_id': customer[idx_c],
+        'Frequency': frekuensi[idx_c, idx_s],
+        'Total_Transaksi': total[idx_c, idx_s],
+        'Last_Order_Date': terakhir[idx_c, idx_s].view('datetime64[ns]'),
+    })
+    if pd.api.types.is_integer_dtype(df_clean['Total_Transaksi']):
+        df['Total_Transaksi'] = df['Total_Transaksi'].round().astype('int64')
+
+    df['Recency'] = (df['Snapshot'] - df['Last_Order_Date']).dt.days
+    df['Avg_Transaction'] = (df['Total_Transaksi'] / df['Frequency']).round(0).astype(int)
+    return df
+
+
+@instrumen
+def segmentasi_snapshot(df_snap, jenis="gambar"):
+    # Rule dievaluasi sekali untuk semua snapshot (long format); jenis: key ATURAN_SEGMEN
+    rules, default = ATURAN_SEGMEN[jenis]
+    df = df_snap.copy()
+    df['Segment'] = segmentasi_rfm(df, rules=rules, default=default)
+    return df
+
+
+@instrumen
+def matriks_transisi(df_snap_seg, dari, ke, kolom='Segment', normalisasi=False):
+    # Baris = segment di snapshot "dari", kolom = segment di snapshot "ke".
+    # Customer yang baru muncul setelah "dari" masuk baris "(Baru)".
+    awal = df_snap_seg.loc[df_snap_seg['Snapshot'] == dari, ['Customer_id', kolom]]
+    akhir = df_snap_seg.loc[df_snap_seg['Snapshot'] == ke, ['Customer_id', kolom]]
+    pasangan = akhir.merge(awal, on='Customer_id', how='left', suffixes=('_ke', '_dari'))
+    pasangan[f'{kolom}_dari'] = pasangan[f'{kolom}_dari'].fillna('(Baru)')
+
+    matriks = pd.crosstab(pasangan[f'{kolom}_dari'], pasangan[f'{kolom}_ke'])
+    matriks = matriks.rename_axis(index='Dari', columns='Ke')
+    if normalisasi:
+        matriks = (matriks.div(matriks.sum(axis=1), axis=0) * 100).round(2)
+    return matriks
+
+
+@instrumen
+def ukuran_segmen_snapshot(df_snap_seg, kolom='Segment'):
+    # Jumlah customer per segment di tiap snapshot (untuk grafik tren)
+    return (
+        df_snap_seg.groupby(['Snapshot', kolom]).size()
+        .rename('Customer_Count').reset_index()
+    )
+
+
+# 2d) Skor RFM kuantil (R/F/M 1-5)
+# Batas kuantil (20/40/60/80%) diambil dari sketsa t-digest, bukan sort penuh: sketsa
+# bisa diisi per chunk & digabung antar proses, ukurannya tetap (~delta centroid),
+# dan biaya per baris konstan (buffer berukuran tetap yang di-sort) -> linear.
+# Kombinasi skor dipetakan ke segmen lewat tabel lookup 5x5x5, bukan if/elif.
+N_SKOR = 5
+KOLOM_SKOR = {'Recency': 'R_Score', 'Frequency': 'F_Score', 'Total_Transaksi': 'M_Score'}
+
+
+class SketsaKuantil:
+    # Centroid = (mean, bobot, nilai terkecil, nilai terbesar). Kuantil diinterpolasi
+    # di dalam rentang centroid, jadi nilai yang sangat sering muncul (Frequency = 1,
+    # harga paket yang sama) menghasilkan batas yang eksak.
+    def __init__(self, delta=200, ukuran_buffer=50_000):
+        self.delta = delta
+        self.ukuran_buffer = ukuran_buffer
+        self.mean = self.bobot = self.lo = self.hi = np.empty(0)
+        self.n = 0
+        self._buffer = []
+        self._n_buffer = 0
+
+    def tambah(self, nilai):
+        x = np.asarray(nilai, dtype='float64').ravel()
+        x = x[~np.isnan(x)]
+        self.n += len(x)
+        # Dipotong per ukuran_buffer: tiap kompres hanya sort buffer + centroid
+        for awal in range(0, len(x), self.ukuran_buffer):
+            potong = x[awal:awal + self.ukuran_buffer]
+            self._buffer.append((potong, np.ones(len(potong)), potong, potong))
+            self._n_buffer += len(potong)
+            if self._n_buffer >= self.ukuran_buffer:
+                self._kompres()
+        return self
+
+    def gabung(self, lain):
+        # Sketsa dari chunk / proses lain (hasilnya setara dengan sketsa semua data)
+        lain._kompres()
+        self.n += lain.n
+        self._buffer.append((lain.mean, lain.bobot, lain.lo, lain.hi))
+        self._kompres()
+        return self
+
+    def _kompres(self):
+        if not self._buffer:
+            return
+        mean, bobot, lo, hi = (
+            np.concatenate([lama] + [b[i] for b in self._buffer])
+            for i, lama in enumerate((self.mean, self.bobot, self.lo, self.hi))
+        )
+        self._buffer, self._n_buffer = [], 0
+        if len(mean) == 0:
+            return
+
+        urut = np.argsort(mean, kind='stable')
+        mean, bobot, lo, hi = mean[urut], bobot[urut], lo[urut], hi[urut]
+        # Fungsi skala k1: satu grup = satu satuan k, jadi centroid di ekor lebih kecil
+        kiri = (np.cumsum(bobot) - bobot) / bobot.sum()
+        k = self.delta / (2 * np.pi) * np.arcsin(np.clip(2 * kiri - 1, -1, 1))
+        grup = np.floor(k - k[0]).astype(np.int64)
+        # Nilai yang sama selalu satu grup; nilai yang sangat sering (bobot >= n/delta,
+        # paling banyak delta nilai) jadi grup sendiri supaya batasnya eksak
+        awal_run = np.flatnonzero(np.r_[True, mean[1:] != mean[:-1]])
+        panjang_run = np.diff(np.r_[awal_run, len(mean)])
+        berat = (
+            (np.add.reduceat(bobot, awal_run) >= bobot.sum() / self.delta)
+            & (np.minimum.reduceat(lo, awal_run) == np.maximum.reduceat(hi, awal_run))
+        )
+        grup_run = grup[awal_run]
+        pisah = np.r_[True, (grup_run[1:] != grup_run[:-1]) | berat[1:] | berat[:-1]]
+        grup = np.repeat(np.cumsum(pisah), panjang_run)
+
+        awal = np.flatnonzero(np.r_[True, grup[1:] != grup[:-1]])
+        self.bobot = np.add.reduceat(bobot, awal)
+        self.mean = np.add.reduceat(bobot * mean, awal) / self.bobot
+        self.lo = np.minimum.reduceat(lo, awal)
+        self.hi = np.maximum.reduceat(hi, awal)
+
+    def kuantil(self, q):
+        self._kompres()
+        q = np.asarray(q, dtype='float64')
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        # Posisi q*n jatuh di centroid mana, lalu interpolasi linear lo -> hi di dalamnya
+        kanan = np.cumsum(self.bobot)
+        target = q * kanan[-1]
+        i = np.minimum(np.searchsorted(kanan, target, side='left'), len(kanan) - 1)
+        porsi = np.clip((target - (kanan[i] - self.bobot[i])) / self.bobot[i], 0, 1)
+        return self.lo[i] + porsi * (self.hi[i] - self.lo[i])
+
+
+@instrumen
+def batas_skor_rfm(potongan, n_skor=N_SKOR):
+    # potongan: DataFrame RFM, atau iterable chunk DataFrame RFM
+    # (mis. pd.read_csv("assets/rfm_result.csv", chunksize=500_000))
+    if isinstance(potongan, pd.DataFrame):
+        potongan = [potongan]
+    sketsa = {kol: SketsaKuantil() for kol in KOLOM_SKOR}
+    for df in potongan:
+        for kol, s in sketsa.items():
+            s.tambah(df[kol].to_numpy())
+    q = np.arange(1, n_skor) / n_skor
+    # Rentang centroid hasil gabung bisa sedikit tumpang tindih -> paksa tetap naik
+    return {kol: np.maximum.accumulate(s.kuantil(q)) for kol, s in sketsa.items()}
+
+
+def tabel_batas_skor(batas):
+    # Batas per skor untuk ditampilkan: baris = kolom RFM, kolom = Q20..Q80
+    kolom_q = [f"Q{round(100 * (i + 1) / N_SKOR)}" for i in range(N_SKOR - 1)]
+    return pd.DataFrame(
+        [batas[kol] for kol in KOLOM_SKOR], index=list(KOLOM_SKOR), columns=kolom_q
+    ).rename_axis('Kolom').reset_index()
+
+
+def _skor(nilai, batas, balik=False):
+    # nilai <= Q20 -> 1, ..., > Q80 -> 5 (Recency dibalik: makin baru makin tinggi)
+    skor = np.searchsorted(batas, nilai, side='left') + 1
+    return (N_SKOR + 1 - skor if balik else skor).astype(np.int8)
+
+
+# Peta segmen: baris = R (5 -> 1), kolom = rata-rata F & M dibulatkan ke atas (1 -> 5)
+_GRID_SEGMEN_SKOR = [
+    ["New Customers", "Potential Loyalists", "Potential Loyalists", "Champions", "Champions"],
+    ["Promising", "Potential Loyalists", "Potential Loyalists", "Loyal Customers", "Champions"],
+    ["About to Sleep", "Need Attention", "Need Attention", "Loyal Customers", "Loyal Customers"],
+    ["Hibernating", "Hibernating", "At Risk", "At Risk", "Can't Lose Them"],
+    ["Lost", "Hibernating", "At Risk", "At Risk", "Can't Lose Them"],
+]
+_URUTAN_SEGMEN_SKOR = [
+    "Champions", "Loyal Customers", "Potential Loyalists", "New Customers", "Promising",
+    "Need Attention", "About to Sleep", "At Risk", "Can't Lose Them", "Hibernating", "Lost",
+]
+
+
+def _tabel_segmen_skor():
+    r, f, m = np.meshgrid(*[np.arange(1, N_SKOR + 1)] * 3, indexing='ij')
+    r, f, m = r.ravel(), f.ravel(), m.ravel()
+    fm = (f + m + 1) // 2
+    nama = [_GRID_SEGMEN_SKOR[N_SKOR - ri][fmi - 1] for ri, fmi in zip(r, fm)]
+    label = [f"{_URUTAN_SEGMEN_SKOR.index(n) + 1:02d}-{n}" for n in nama]
+    return pd.DataFrame({'R_Score': r, 'F_Score': f, 'M_Score': m, 'Segment_Skor': label})
+
+
+# Satu baris per kombinasi skor, urut (R, F, M): index = (R-1)*25 + (F-1)*5 + (M-1)
+TABEL_SEGMEN_SKOR = _tabel_segmen_skor()
+_LABEL_SEGMEN_SKOR = TABEL_SEGMEN_SKOR['Segment_Skor'].to_numpy()
+
+
+@instrumen
+def skor_rfm(df_rfm, batas=None):
+    # batas: hasil batas_skor_rfm (mis. dari data chunked / histori); None = dari df_rfm
+    if batas is None:
+        batas = batas_skor_rfm(df_rfm)
+    df = df_rfm.copy()
+    for kol, nama in KOLOM_SKOR.items():
+        df[nama] = _skor(df[kol].to_numpy(), batas[kol], balik=(kol == 'Recency'))
+
+    r = df['R_Score'].to_numpy(dtype=np.int16)
+    f = df['F_Score'].to_numpy(dtype=np.int16)
+    m = df['M_Score'].to_numpy(dtype=np.int16)
+    df['RFM_Score'] = r * 100 + f * 10 + m
+    df['Segment_Skor'] = _LABEL_SEGMEN_SKOR[(r - 1) * N_SKOR ** 2 + (f - 1) * N_SKOR + (m - 1)]
+    return df
+
+
+# 3) Segmentasi RFM (rule sebagai data)
+# Setiap rule = (label, [(kolom, operator, nilai), ...]); rule dievaluasi
+# berurutan seperti if/elif, rule pertama yang cocok yang dipakai.
+_OPERATOR = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+}
+
+# Rule versi gambar (10 segmen, dipakai di tabel "RFM Segment Analysis")
+SEGMENT_RULES = [
+    ("01-Champion", [('Recency', '<=', 30), ('Frequency', '>=', 10)]),
+    ("02-Loyal Customers", [('Frequency', '>=', 7)]),
+    ("03-Potential Loyalists", [('Recency', '<=', 60), ('Frequency', '>=', 3)]),
+    ("04-Can't Lose Them", [('Recency', '>', 90), ('Frequency', '>=', 8)]),
+    ("05-Need Attention", [('Recency', '>', 60), ('Frequency', '<=', 3)]),
+    ("06-New Customers", [('Recency', '<=', 30), ('Frequency', '==', 1)]),
+    ("07-Promising", [('Recency', '<=', 90), ('Frequency', '==', 1)]),
+    ("08-At Risk", [('Recency', '>', 90), ('Frequency', '<=', 4)]),
+    ("09-About to Sleep", [('Recency', '>', 60), ('Frequency', '<=', 2)]),
+]
+SEGMENT_DEFAULT = "10-Hibernating"
+
+# Rule binning sederhana (kolom "Segment" yang dipakai di RFM Insights)
+SEGMENT_RULES_SEDERHANA = [
+    ("Champion", [('Recency', '<=', 30), ('Frequency', '>=', 4)]),
+    ("Loyal Customers", [('Frequency', '>=', 3)]),
+    ("Potential Loyalists", [('Frequency', '>=', 2), ('Recency', '<=', 60)]),
+    ("Can't Lose Them", [('Frequency', '>=', 2), ('Recency', '>', 90)]),
+    ("At Risk", [('Frequency', '==', 1), ('Recency', '>', 90)]),
+    ("About to Sleep", [('Recency', '>', 60), ('Frequency', '==', 1)]),
+    ("New Customers", [('Recency', '<=', 30), ('Frequency', '==', 1)]),
+    ("Promising", [('Recency', '<=', 90), ('Frequency', '==', 1)]),
+    ("Need Attention", [('Frequency', '<=', 2)]),
+]
+SEGMENT_DEFAULT_SEDERHANA = "Others"
+
+# Rule set yang bisa dipilih lewat nama (mis. untuk key cache)
+ATURAN_SEGMEN = {
+    "gambar": (SEGMENT_RULES, SEGMENT_DEFAULT),
+    "sederhana": (SEGMENT_RULES_SEDERHANA, SEGMENT_DEFAULT_SEDERHANA),
+}
+
+
+@instrumen
+def segmentasi_rfm(df_rfm, rules=SEGMENT_RULES, default=SEGMENT_DEFAULT, kolom=None):
+    # kolom: mapping nama kolom di rule -> nama kolom di df_rfm,
+    # mis. {'Recency': 'day_since_last_order', 'Frequency': 'order_cnt'}
+    kolom = kolom or {}
+    nilai = {}
+    masks = []
+    for _, kondisi in rules:
+        mask = np.ones(len(df_rfm), dtype=bool)
+        for col, op, batas in kondisi:
+            if col not in nilai:
+                nilai[col] = df_rfm[kolom.get(col, col)].to_numpy()
+            mask &= _OPERATOR[op](nilai[col], batas)
+        masks.append(mask)
+
+    # Pilih index rule (default = index terakhir), lalu map ke label
+    labels = np.array([label for label, _ in rules] + [default], dtype=object)
+    if masks:
+        kode = np.select(masks, np.arange(len(rules)), default=len(rules))
+    else:
+        kode = np.zeros(len(df_rfm), dtype=int)
+    return pd.Series(labels[kode], index=df_rfm.index)
+
+
+# 4) Tabel turunan untuk halaman RFM Analysis & Insights
+# Semua fungsi di sini tidak mengubah input (hasilnya bisa di-cache & dipakai bersama).
+KOLOM_ANALISIS = {'Recency': 'day_since_last_order', 'Frequency': 'order_cnt'}
+RENAME_ANALISIS = {
+    'Recency': 'day_since_last_order',
+    'Frequency': 'order_cnt',
+    'Total_Transaksi': 'total_order_value'
+}
+
+
+@instrumen
+def rfm_analisis(df_rfm):
+    # Segmentasi sederhana (kolom "Segment"), dipakai di RFM Insights
+    df = df_rfm.rename(columns=RENAME_ANALISIS)
+    df['Segment'] = segmentasi_rfm(
+        df,
+        rules=SEGMENT_RULES_SEDERHANA,
+        default=SEGMENT_DEFAULT_SEDERHANA,
+        kolom=KOLOM_ANALISIS
+    )
+    return df
+
+
+# Ringkasan per segmen: satu groupby menghasilkan nunique + mean/median/sum
+# untuk semua kolom; tabel statistik, tabel segmen & leaderboard tinggal
+# memilih/rename kolom dari hasil ini (tidak groupby ulang).
+KOLOM_RINGKASAN = ('day_since_last_order', 'order_cnt', 'total_order_value')
+
+
+@instrumen
+def ringkasan_segmen(df, kolom_segmen='Segment', kolom_nilai=KOLOM_RINGKASAN):
+    g = df.groupby(kolom_segmen)
+    hasil = g[list(kolom_nilai)].agg(['mean', 'median', 'sum'])
+    hasil.columns = [f"{col}_{stat}" for col, stat in hasil.columns]
+    hasil.insert(0, 'nunique', g['Customer_id'].nunique())
+    return hasil.reset_index()
+
+
+@instrumen
+def statistik_segmen(ringkasan):
+    return ringkasan.rename(columns={
+        'nunique': 'Customer_Count',
+        'day_since_last_order_mean': 'Mean_Days',
+        'day_since_last_order_median': 'Median_Days',
+        'order_cnt_mean': 'Mean_Orders',
+        'order_cnt_median': 'Median_Orders',
+        'total_order_value_mean': 'Mean_Value',
+        'total_order_value_median': 'Median_Value'
+    })[['Segment', 'Customer_Count', 'Mean_Days', 'Median_Days', 'Mean_Orders',
+        'Median_Orders', 'Mean_Value', 'Median_Value']
+       ].sort_values(by='Customer_Count', ascending=False).reset_index(drop=True)
+
+
+@instrumen
+def rfm_segmen_gambar(df_rfm):
+    # Segmentasi versi gambar (kolom "segment") + pct_unique dummy
+    df = df_rfm.rename(columns=RENAME_ANALISIS)
+    if 'pct_unique' not in df.columns:
+        df['pct_unique'] = np.random.RandomState(42).uniform(1, 30, size=len(df)).round(1)
+    df['segment'] = segmentasi_rfm(df, kolom=KOLOM_ANALISIS)
+    return df
+
+
+@instrumen
+def tabel_segmen_gambar(ringkasan):
+    return ringkasan[['segment', 'nunique',
+                      'day_since_last_order_mean', 'day_since_last_order_median',
+                      'order_cnt_mean', 'order_cnt_median',
+                      'total_order_value_mean', 'total_order_value_median',
+                      'pct_unique_mean', 'pct_unique_median']]
+
+
+@instrumen
+def distribusi_segmen(df_segmen):
+    # Jumlah & persentase per segmen, plus versi dengan baris TOTAL
+    distrib_df = (
+        df_segmen['segment']
+        .value_counts()
+        .rename_axis('Segment')
+        .reset_index(name='Customer_Count')
+        .sort_values('Customer_Count', ascending=False)
+        .reset_index(drop=True)
+    )
+
+    total_cust = distrib_df['Customer_Count'].sum()
+    distrib_df['Percent'] = (distrib_df['Customer_Count'] / total_cust * 100).round(2)
+    distrib_df['Percent_Label'] = distrib_df['Percent'].astype(str) + '%'
+
+    total_row = pd.DataFrame({
+        "Segment": ["TOTAL"],
+        "Customer_Count": [total_cust],
+        "Percent": [100.0],
+        "Percent_Label": ["100%"]
+    })
+    distrib_df_total = pd.concat([distrib_df, total_row], ignore_index=True)
+    return distrib_df, distrib_df_total
+
+
+@instrumen
+def ukuran_segmen_treemap(df_segmen):
+    segment_size = df_segmen['segment'].value_counts().reset_index()
+    segment_size.columns = ['segment', 'customer_count']
+
+    total_customer = segment_size['customer_count'].sum()
+    segment_size['percent'] = (segment_size['customer_count'] / total_customer * 100).round(1)
+    segment_size['label_full'] = (
+        segment_size['segment'] + ' (' + segment_size['customer_count'].astype(str)
+        + ' | ' + segment_size['percent'].astype(str) + '%)'
+    )
+    segment_size['color'] = segment_size['segment']
+    return segment_size
+
+
+@instrumen
+def histogram_rfm(df, kolom, nbins=30, log=False):
+    # Histogram dihitung di server (NumPy), chart cukup menerima nbins baris,
+    # bukan satu titik per customer. log=True: bin logaritmik (untuk Monetary).
+    x = df[kolom].to_numpy(dtype='float64')
+    x = x[np.isfinite(x)]
+    if log:
+        x = x[x > 0]
+    if len(x) == 0:
+        return pd.DataFrame(columns=['Bin_Awal', 'Bin_Akhir', 'Bin_Tengah', 'Label', 'Jumlah'])
+
+    if log:
+        lo, hi = x.min(), x.max()
+        edges = np.geomspace(lo, hi if hi > lo else lo * 1.01, nbins + 1)
+        tengah = np.sqrt(edges[:-1] * edges[1:])
+    else:
+        edges = np.histogram_bin_edges(x, bins=nbins)
+        tengah = (edges[:-1] + edges[1:]) / 2
+    jumlah, _ = np.histogram(x, bins=edges)
+
+    return pd.DataFrame({
+        'Bin_Awal': edges[:-1],
+        'Bin_Akhir': edges[1:],
+        'Bin_Tengah': tengah,
+        'Label': [f"{a:,.0f} – {b:,.0f}" for a, b in zip(edges[:-1], edges[1:])],
+        'Jumlah': jumlah,
+    })
+
+
+@instrumen
+def gabung_nama(df_rfm_seg, df_clean):
+    # Satukan Customer_name ke tabel segmen
+    if "Customer_name" in df_clean.columns:
+        df_names = df_clean[["Customer_id", "Customer_name"]].drop_duplicates()
+    else:
+        df_names = pd.DataFrame({
+            "Customer_id": df_clean["Customer_id"].unique(),
+            "Customer_name": np.nan
+        })
+    return df_rfm_seg.merge(df_names, on="Customer_id", how="left")
+
+
+@instrumen
+def ringkasan_rfm(df_rfm_seg):
+    total_pelanggan = df_rfm_seg["Customer_id"].nunique()
+    avg_freq = df_rfm_seg["order_cnt"].mean()
+    avg_monetary = df_rfm_seg["total_order_value"].mean()
+    return total_pelanggan, avg_freq, avg_monetary
+
+
+@instrumen
+def daftar_segmen(df_rfm_seg):
+    return sorted(df_rfm_seg["Segment"].dropna().unique().tolist())
+
+
+@instrumen
+def leaderboard_segmen(ringkasan):
+    return (
+        ringkasan.rename(columns={
+            'nunique': 'Customer_Count',
+            'order_cnt_mean': 'Avg_Freq',
+            'total_order_value_mean': 'Avg_Monetary',
+            'total_order_value_sum': 'Total_Monetary',
+        })[['Segment', 'Customer_Count', 'Avg_Freq', 'Avg_Monetary', 'Total_Monetary']]
+        .sort_values("Total_Monetary", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+@instrumen
+def top_customers(df_rfm_seg, n=20, per_segmen=False):
+    # Seleksi parsial (nlargest), tidak perlu sort semua customer
+    if per_segmen:
+        idx = (
+            df_rfm_seg.groupby("Segment")["total_order_value"]
+            .nlargest(n)
+            .index.get_level_values(-1)
+        )
+        df_top = df_rfm_seg.loc[idx]
+    else:
+        df_top = df_rfm_seg.nlargest(n, "total_order_value")
+
+    return (
+        df_top
+        .loc[:, ["Customer_id", "Customer_name", "Segment", "order_cnt", "total_order_value", "day_since_last_order"]]
+        .rename(columns={
+            "order_cnt": "Frequency",
+            "total_order_value": "Total_Transaksi",
+            "day_since_last_order": "Recency(Hari)"
+        })
+    )
+
+
+@instrumen
+def filter_segmen(df_rfm_seg, segment, search_q="", index=None, semua_segmen=False):
+    # index: IndexPencarian dari df_rfm_seg yang sama (tanpa index -> scan string biasa)
+    # semua_segmen: pencarian lintas segment, kolom Segment ikut ditampilkan
+    if search_q and index is not None:
+        df_segview = df_rfm_seg.iloc[index.cari(search_q)]
+    elif search_q:
+        df_segview = df_rfm_seg[
+            df_rfm_seg["Customer_id"].astype(str).str.lower().str.contains(search_q, regex=False)
+            | df_rfm_seg["Customer_name"].astype(str).str.lower().str.contains(search_q, regex=False)
+        ]
+    else:
+        df_segview = df_rfm_seg
+    if not semua_segmen:
+        df_segview = df_segview[df_segview["Segment"] == segment]
+
+    kolom = ["Customer_id", "Customer_name", "order_cnt", "total_order_value", "day_since_last_order"]
+    if semua_segmen:
+        kolom.insert(2, "Segment")
+    return (
+        df_segview.loc[:, kolom]
+        .rename(columns={
+            "order_cnt": "Frequency",
+            "total_order_value": "Total_Transaksi",
+            "day_since_last_order": "Recency(Hari)"
+        })
+    )
+
+
+# 5) Clustering K-Means (dari notebook: StandardScaler -> KMeans k=4)
+# Mode "minibatch" untuk customer sangat banyak, restart n_init dijalankan
+# paralel, dan centroid lama bisa dipakai sebagai titik awal (warm start).
+FITUR_CLUSTER = ['Frequency', 'Total_Transaksi', 'Recency', 'Avg_Transaction']
+BATAS_MINIBATCH = 50_000  # mode "auto": di atas ini pakai MiniBatchKMeans
+
+
+def _fit_kmeans(X, n_clusters, init, seed, minibatch):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    if minibatch:
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters, init=init, n_init=1, random_state=seed,
+            batch_size=4096
+        )
+    else:
+        model = KMeans(n_clusters=n_clusters, init=init, n_init=1, random_state=seed)
+    return model.fit(X)
+
+
+def _skala_fitur(df_rfm):
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    X = scaler.fit_transform(df_rfm[FITUR_CLUSTER].to_numpy(dtype='float64'))
+    return X, scaler
+
+
+def _pakai_minibatch(mode, n):
+    return mode == "minibatch" or (mode == "auto" and n > BATAS_MINIBATCH)
+
+
+@instrumen
+def cluster_rfm(df_rfm, n_clusters=4, mode="auto", n_init=10, random_state=42,
+                init_centroid=None, n_jobs=-1, model=None):
+    # model: model yang sudah di-fit (mis. dari sweep_k), langsung dipakai tanpa fit ulang
+    from joblib import Parallel, delayed
+
+    X, scaler = _skala_fitur(df_rfm)
+    minibatch = _pakai_minibatch(mode, len(X))
+
+    if model is not None:
+        models = [model]
+    elif init_centroid is not None:
+        # Warm start: centroid (skala asli) dari hasil sebelumnya, cukup 1 kali fit
+        init = scaler.transform(np.asarray(init_centroid, dtype='float64'))
+        models = [_fit_kmeans(X, n_clusters, init, random_state, minibatch)]
+    else:
+        seeds = np.random.RandomState(random_state).randint(0, 2**31 - 1, size=n_init)
+        models = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_fit_kmeans)(X, n_clusters, "k-means++", int(seed), minibatch)
+            for seed in seeds
+        )
+    model = min(models, key=lambda m: m.inertia_)
+
+    df = df_rfm.copy()
+    df['Cluster'] = model.predict(X)
+    centroid = pd.DataFrame(scaler.inverse_transform(model.cluster_centers_), columns=FITUR_CLUSTER)
+    centroid.index.name = 'Cluster'
+    return df, centroid, model.inertia_
+
+
+@instrumen
+def ringkasan_cluster(df_cluster):
+    # Ringkasan statistik per cluster (notebook [14])
+    summary_stats = df_cluster.groupby("Cluster").agg({
+        "Recency": ["mean", "median", "nunique"],
+        "Frequency": ["mean", "median", "nunique"],
+        "Total_Transaksi": ["mean", "median", "nunique"]
+    }).round(2)
+    summary_stats.columns = ['_'.join(col) for col in summary_stats.columns]
+    summary_stats['Jumlah_Pelanggan'] = df_cluster['Cluster'].value_counts().sort_index()
+    return summary_stats.reset_index()
+
+
+# 5b) Pemilihan k: Elbow (WCSS), Davies-Bouldin, Silhouette
+# Tiap k di-fit paralel di process pool. Silhouette (O(n^2)) dihitung di sampel
+# terstratifikasi per cluster, diulang beberapa kali untuk interval kepercayaan 95%.
+def _sampel_stratified(labels, sample_size, rng):
+    if len(labels) <= sample_size:
+        return np.arange(len(labels))
+    idx = []
+    for label in np.unique(labels):
+        anggota = np.flatnonzero(labels == label)
+        n = max(2, int(round(sample_size * len(anggota) / len(labels))))
+        idx.append(rng.choice(anggota, size=min(n, len(anggota)), replace=False))
+    return np.concatenate(idx)
+
+
+def _evaluasi_k(X, k, n_init, random_state, minibatch, sample_size, n_repeat):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+    from threadpoolctl import threadpool_limits
+
+    # Satu thread per proses, paralelnya sudah di level process pool
+    with threadpool_limits(limits=1):
+        if minibatch:
+            model = MiniBatchKMeans(n_clusters=k, n_init=n_init, random_state=random_state, batch_size=4096)
+        else:
+            model = KMeans(n_clusters=k, n_init=n_init, random_state=random_state)
+        labels = model.fit_predict(X)
+
+        hasil = {'k': k, 'WCSS': model.inertia_, 'DBI': np.nan,
+                 'Silhouette': np.nan, 'Silhouette_CI95': np.nan}
+        if 1 < k < len(X) and len(np.unique(labels)) > 1:
+            hasil['DBI'] = davies_bouldin_score(X, labels)
+            # Data kecil: silhouette penuh sekali saja (CI = 0)
+            ulang = n_repeat if len(X) > sample_size else 1
+            rng = np.random.RandomState(random_state)
+            skor = []
+            for _ in range(ulang):
+                idx = _sampel_stratified(labels, sample_size, rng)
+                skor.append(silhouette_score(X[idx], labels[idx]))
+            hasil['Silhouette'] = float(np.mean(skor))
+            hasil['Silhouette_CI95'] = (
+                float(1.96 * np.std(skor, ddof=1) / np.sqrt(ulang)) if ulang > 1 else 0.0
+            )
+    return hasil, model
+
+
+@instrumen
+def sweep_k(df_rfm, k_values=range(1, 10), mode="auto", n_init=10, random_state=42,
+            sample_size=5000, n_repeat=5, max_workers=None):
+    from joblib import Parallel, delayed
+
+    X, _ = _skala_fitur(df_rfm)
+    minibatch = _pakai_minibatch(mode, len(X))
+
+    # Worker loky (proses baru, bukan fork): dipanggil dari server Streamlit yang
+    # multi-thread, fork bisa menyalin lock yang sedang dipegang -> worker deadlock.
+    # Spawn biasa juga tidak bisa: __main__ di Streamlit = script halaman, ikut dijalankan ulang.
+    hasil = Parallel(n_jobs=max_workers or -1, backend="loky")(
+        delayed(_evaluasi_k)(X, k, n_init, random_state, minibatch, sample_size, n_repeat)
+        for k in k_values
+    )
+
+    # Model hasil fit disimpan supaya k terpilih bisa langsung dipakai (cluster_rfm(model=...))
+    df_hasil = pd.DataFrame([h for h, _ in hasil])
+    models = {h['k']: model for h, model in hasil}
+    return df_hasil, models
+
+
+# 6) Index pencarian customer (ID & nama)
+# Dibangun sekali per dataset dari satu buffer codepoint datar (semua teks
+# "id<SEP>nama" disambung) + offset tiap baris, jadi memori ~ total karakter,
+# bukan jumlah baris x nama terpanjang. Nama dipotong MAKS_NAMA karakter.
+# Posting per n-gram: 1-2 huruf -> daftar baris, 3 huruf -> posisi di buffer.
+# Query >= 3 huruf: posisi trigram ke-j digeser -j lalu diiris, jadi yang tersisa
+# persis posisi awal substring (tanpa verifikasi per baris); query 1-2 huruf
+# langsung dari posting unigram/bigram. Hasilnya sama dengan str.contains.
+# Codepoint dipetakan ke indeks alfabet dataset supaya kode n-gram muat di int64.
+class IndexPencarian:
+    N = 3
+    SEP = "\x01"
+    MAKS_NAMA = 64
+
+    def __init__(self, customer_id, customer_name):
+        ids = pd.Series(customer_id).astype(str).str.lower().reset_index(drop=True)
+        names = pd.Series(customer_name).astype(str).str.lower().str.slice(0, self.MAKS_NAMA)
+        teks = ids + self.SEP + names.reset_index(drop=True)
+        self.n = len(teks)
+
+        panjang = teks.str.len().to_numpy(dtype='int64')
+        self._ujung = np.cumsum(panjang)  # offset akhir (eksklusif) tiap baris di buffer
+        buf = np.frombuffer("".join(teks).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        # Alfabet lewat bincount (np.unique berbasis hash lambat untuk jutaan elemen)
+        self._alfabet = np.flatnonzero(np.bincount(buf)) if len(buf) else np.array([], dtype='int64')
+        peta = np.zeros(len(buf) and int(buf.max()) + 1, dtype='int32')
+        peta[self._alfabet] = np.arange(len(self._alfabet))
+        simbol = peta[buf]
+        del buf, peta
+        self._baris = np.repeat(np.arange(self.n, dtype='int32'), panjang)
+        self._gram = {n: self._bangun(simbol, n) for n in range(1, self.N + 1)}
+
+    def _bangun(self, simbol, n):
+        # -> (kode unik, isi posting, offset); isi = baris (n < N) atau posisi (n == N).
+        # Operasi in-place di satu array int64 supaya puncak memori ~ beberapa x jumlah karakter.
+        m = len(simbol) - n + 1
+        if m <= 0:
+            return np.array([], dtype='int64'), np.array([], dtype='int32'), np.array([0])
+        k = len(self._alfabet)
+        kode = simbol[:m].astype('int64')
+        for j in range(1, n):
+            kode *= k
+            kode += simbol[j:j + m]
+        # n-gram tidak boleh melewati batas baris
+        valid = self._baris[:m] == self._baris[n - 1:]
+        kode = kode[valid]
+
+        if n < self.N:
+            isi, rentang = self._baris[:m][valid], self.n
+        else:
+            isi, rentang = np.flatnonzero(valid), len(simbol)
+        del valid
+        tipe = 'int32' if rentang < 2 ** 31 else 'int64'
+        if k ** n * rentang < 2 ** 63:
+            # Urutkan (kode, isi) sebagai satu kunci int64: kode * rentang + isi
+            kode *= rentang
+            kode += isi
+            del isi
+            kode.sort()
+            if n < self.N:
+                # Cukup baris unik per gram
+                kode = kode[np.r_[True, kode[1:] != kode[:-1]]]
+            isi = (kode % rentang).astype(tipe)
+            kode //= rentang
+        else:
+            # Alfabet sangat besar: kunci gabungan tidak muat di int64
+            urut = np.lexsort((isi, kode))
+            kode, isi = kode[urut], isi[urut].astype(tipe)
+            if n < self.N:
+                baru = np.r_[True, (kode[1:] != kode[:-1]) | (isi[1:] != isi[:-1])]
+                kode, isi = kode[baru], isi[baru]
+
+        awal = np.flatnonzero(np.r_[True, kode[1:] != kode[:-1]]) if len(kode) else np.array([], dtype='int64')
+        return kode[awal], isi, np.r_[awal, len(kode)]
+
+    def _posting(self, n, kode):
+        kode_unik, isi, offset = self._gram[n]
+        i = np.searchsorted(kode_unik, kode)
+        if i >= len(kode_unik) or kode_unik[i] != kode:
+            return None
+        return isi[offset[i]:offset[i + 1]]
+
+    def cari(self, q):
+        # Hasil: posisi baris (urut naik) yang ID atau namanya mengandung q
+        q = q.strip().lower()
+        if not q:
+            return np.arange(self.n)
+        kosong = np.array([], dtype='int64')
+        if self.SEP in q:
+            return kosong
+
+        c = np.frombuffer(q.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        simbol = np.searchsorted(self._alfabet, c)
+        if (simbol >= len(self._alfabet)).any() or (self._alfabet[np.minimum(simbol, len(self._alfabet) - 1)] != c).any():
+            return kosong
+        k = len(self._alfabet)
+
+        if len(q) < self.N:
+            kode = simbol[0] if len(q) == 1 else simbol[0] * k + simbol[1]
+            posting = self._posting(len(q), kode)
+            return kosong if posting is None else posting.astype('int64')
+
+        # Posisi awal substring = irisan (posisi trigram ke-j) - j, mulai dari posting terpendek
+        postings = []
+        for j in range(len(q) - self.N + 1):
+            posting = self._posting(self.N, (simbol[j] * k + simbol[j + 1]) * k + simbol[j + 2])
+            if posting is None:
+                return kosong
+            postings.append((posting, j))
+        postings.sort(key=lambda p: len(p[0]))
+        kandidat = postings[0][0].astype('int64') - postings[0][1]
+        for posting, j in postings[1:]:
+            cari_pos = kandidat + j
+            pos = np.searchsorted(posting, cari_pos)
+            pos[pos >= len(posting)] = 0
+            kandidat = kandidat[posting[pos] == cari_pos]
+            if len(kandidat) == 0:
+                return kosong
+
+        baris = self._baris[kandidat]
+        return baris[np.r_[True, baris[1:] != baris[:-1]]].astype('int64')
+
+
+@instrumen
+def buat_index_pencarian(df_rfm_seg):
+    return IndexPencarian(df_rfm_seg["Customer_id"], df_rfm_seg["Customer_name"])
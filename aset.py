@@ -0,0 +1,37 @@
+import os
+
+import streamlit as st
+
+# Aset statis (favicon, CSS) dibaca dari disk sekali per proses server lalu dipakai
+# bersama semua session & rerun, bukan dibuka ulang di tiap script run.
+FAVICON_PATH = os.path.join("assets", "favicon.png")
+CSS_PATH = os.path.join("assets", "style_qaraa.css")
+CONTOH_PATH = os.path.join("assets", "sample_transaksi.csv")
+
+
+@st.cache_resource
+def _muat_aset():
+    with open(FAVICON_PATH, "rb") as f:
+        favicon = f.read()
+    with open(CSS_PATH) as f:
+        css = f"<style>{f.read()}</style>"
+    with open(CONTOH_PATH, "rb") as f:
+        contoh = f.read()
+    return {"favicon": favicon, "css": css, "contoh": contoh}
+
+
+def favicon():
+    return _muat_aset()["favicon"]
+
+
+def contoh_csv():
+    return _muat_aset()["contoh"]
+
+
+def pasang_css():
+    st.markdown(_muat_aset()["css"], unsafe_allow_html=True)
+
+
+def konfigurasi_halaman(judul):
+    # Wajib dipanggil sekali, paling awal di tiap halaman
+    st.set_page_config(page_title=judul, page_icon=favicon(), layout="wide")
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import Model
+from ingest import muat_transaksi
+
+# Pipeline tanpa UI (untuk job malam di server):
+# bersihkan -> RFM -> segmentasi (2 rule set) -> clustering, untuk satu atau banyak file.
+# Tiap file dikerjakan di proses terpisah, artefak ditulis ke <output>/<nama_file>/
+# dan waktu tiap tahap dicetak di akhir.
+#
+# Contoh:
+#   python batch.py data_jan.csv data_feb.csv -o hasil -k 4
+#   python batch.py data_2023.csv data_2024.csv --gudang   (+ simpan ke assets/gudang)
+#   python batch.py data_agustus.csv --inkremental assets/rfm_state.csv   (tambah ke RFM histori)
+#   python batch.py --data Data_01.csv Data_02.csv --data2 Data2_01.csv Data2_02.csv -o hasil
+TAHAP = ["bersihkan", "rfm", "segmentasi", "cluster", "tulis"]
+
+
+def _tulis(df, path, fmt):
+    if fmt == "parquet":
+        df.to_parquet(f"{path}.parquet", index=False)
+    else:
+        df.to_csv(f"{path}.csv", index=False)
+
+
+def jalankan_pipeline(sumber, output_dir, n_clusters=4, mode="auto", fmt="csv", nama=None, n_jobs=-1, gudang_dir=None):
+    nama = nama or os.path.splitext(os.path.basename(sumber))[0]
+    folder = os.path.join(output_dir, nama)
+    os.makedirs(folder, exist_ok=True)
+
+    waktu = {}
+    mulai = time.perf_counter()
+
+    def catat(tahap):
+        nonlocal mulai
+        sekarang = time.perf_counter()
+        waktu[tahap] = sekarang - mulai
+        mulai = sekarang
+
+    # 1) Baca + bersihkan (aturan sama dengan bersihkan_data, plus laporan baris dibuang)
+    df_raw, df_clean, laporan = muat_transaksi(sumber)
+    catat("bersihkan")
+
+    # 2) RFM (tanpa menulis assets/rfm_result.csv, tiap file punya folder sendiri)
+    df_rfm = Model._hitung_rfm(df_clean)
+    catat("rfm")
+
+    # 3) Segmentasi: rule 10 segmen + rule sederhana + skor kuantil
+    df_rfm['Segment_RFM'] = Model.segmentasi_rfm(df_rfm)
+    df_rfm['Segment'] = Model.segmentasi_rfm(
+        df_rfm,
+        rules=Model.SEGMENT_RULES_SEDERHANA,
+        default=Model.SEGMENT_DEFAULT_SEDERHANA
+    )
+    df_rfm = Model.skor_rfm(df_rfm)
+    catat("segmentasi")
+
+    # 4) Clustering K-Means
+    n_clusters = min(n_clusters, len(df_rfm))
+    df_cluster, centroid, inertia = Model.cluster_rfm(df_rfm, n_clusters=n_clusters, mode=mode, n_jobs=n_jobs)
+    catat("cluster")
+
+    # 5) Artefak
+    _tulis(df_clean, os.path.join(folder, "data_bersih"), fmt)
+    _tulis(df_cluster, os.path.join(folder, "rfm_segmented_clustered"), fmt)
+    _tulis(centroid.reset_index(), os.path.join(folder, "cluster_centroid"), fmt)
+    if gudang_dir:
+        # Tambah ke gudang transaksi per bulan (baris yang sudah ada dilewati, jadi aman diulang)
+        import gudang
+
+        gudang.simpan_transaksi(df_clean, gudang_dir)
+    catat("tulis")
+
+    ringkasan = {
+        "nama": nama,
+        "sumber": str(sumber),
+        "baris_awal": len(df_raw),
+        "baris_bersih": len(df_clean),
+        "customer": len(df_rfm),
+        "inertia": float(inertia),
+        "laporan_bersihkan": laporan,
+        "waktu_detik": waktu,
+    }
+    with open(os.path.join(folder, "ringkasan.json"), "w") as f:
+        json.dump(ringkasan, f, indent=2, ensure_ascii=False)
+    return ringkasan
+
+
+def jalankan_inkremental(files, state_path, output_dir, fmt="csv", chunksize=100_000):
+    # File dibaca per chunk (Model.bersihkan_data_stream) dan di-fold ke state RFM yang
+    # disimpan di state_path; run berikutnya cukup diberi file baru, histori tidak dibaca ulang
+    mulai = time.perf_counter()
+    state = Model.muat_rfm_state(state_path) if os.path.exists(state_path) else Model.StateRFM()
+    customer_awal = len(state)
+    for f in files:
+        r = Model.bersihkan_data_stream(f, output_path=None, chunksize=chunksize, rfm_state=state)
+        print(f"{f}: {r['baris_bersih']}/{r['baris_awal']} baris -> {len(state)} customer")
+    Model.simpan_rfm_state(state, state_path)
+
+    df_rfm = Model.rfm_dari_state(state)
+    df_rfm['Segment_RFM'] = Model.segmentasi_rfm(df_rfm)
+    folder = os.path.join(output_dir, "inkremental")
+    os.makedirs(folder, exist_ok=True)
+    _tulis(df_rfm, os.path.join(folder, "rfm_result"), fmt)
+    print(f"State {state_path}: {customer_awal} -> {len(state)} customer, "
+          f"{time.perf_counter() - mulai:.2f} dtk -> {folder}")
+    return df_rfm
+
+
+def _gabung_export(args):
+    # Data (Customer_id) x Data2 (Customer_name) -> satu file hasil merge
+    mulai = time.perf_counter()
+    df_merge, laporan, df_tidak_cocok = Model.merge_transaksi(args.data, args.data2)
+    folder = os.path.join(args.output, "merge")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, "hasil_merge.csv")
+    df_merge.to_csv(path, index=False)
+    df_tidak_cocok.to_csv(os.path.join(folder, "tidak_cocok.csv"), index=False)
+
+    print(f"Merge {laporan['file_id']} + {laporan['file_nama']} file: {laporan['baris_merge']} baris "
+          f"(hit rate {laporan['hit_rate_id']:.1%} / {laporan['hit_rate_nama']:.1%}, "
+          f"duplikat dibuang {laporan['duplikat_id'] + laporan['duplikat_nama']}) "
+          f"dalam {time.perf_counter() - mulai:.2f} dtk")
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline RFM tanpa UI: bersihkan -> RFM -> segmentasi -> cluster")
+    parser.add_argument("files", nargs="*", help="file transaksi CSV (format hasil_merge)")
+    parser.add_argument("--data", nargs="+", default=[], help="export Data (berisi Customer_id), untuk di-merge")
+    parser.add_argument("--data2", nargs="+", default=[], help="export Data2 (berisi Customer_name), untuk di-merge")
+    parser.add_argument("-o", "--output", default=os.path.join("assets", "batch"), help="folder output")
+    parser.add_argument("-k", "--clusters", type=int, default=4, help="jumlah cluster K-Means")
+    parser.add_argument("--mode", choices=["auto", "kmeans", "minibatch"], default="auto",
+                        help="auto = MiniBatchKMeans kalau pelanggan sangat banyak, selain itu KMeans biasa")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", dest="fmt")
+    parser.add_argument("--gudang", action="store_const", const=os.path.join("assets", "gudang"), default=None,
+                        help="simpan juga data bersih ke gudang transaksi per bulan (assets/gudang)")
+    parser.add_argument("--inkremental", metavar="STATE_CSV",
+                        help="mode inkremental: file dibaca per chunk & ditambahkan ke state RFM di STATE_CSV "
+                             "(tanpa segmentasi cluster), mis. assets/rfm_state.csv")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="baris per chunk (mode --inkremental)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="jumlah proses (default: jumlah CPU)")
+    args = parser.parse_args(argv)
+    if bool(args.data) != bool(args.data2):
+        parser.error("--data dan --data2 harus diisi bersamaan")
+    if not args.files and not args.data:
+        parser.error("tidak ada file input")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output, exist_ok=True)
+
+    files = list(args.files)
+    if args.data:
+        files.append(_gabung_export(args))
+
+    if args.inkremental:
+        jalankan_inkremental(files, args.inkremental, args.output, args.fmt, args.chunksize)
+        return 0
+
+    workers = min(args.workers or os.cpu_count() or 1, len(files))
+    # Paralel antar file; K-Means di dalam tiap proses cukup 1 thread
+    n_jobs = 1 if workers > 1 else -1
+    opsi = dict(output_dir=args.output, n_clusters=args.clusters, mode=args.mode, fmt=args.fmt, n_jobs=n_jobs,
+                gudang_dir=args.gudang)
+
+    hasil, gagal = [], []
+    mulai = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(jalankan_pipeline, f, **opsi): f for f in files}
+        for future in as_completed(futures):
+            try:
+                hasil.append(future.result())
+            except Exception as e:
+                gagal.append(futures[future])
+                print(f"GAGAL {futures[future]}: {e}", file=sys.stderr)
+
+    if hasil:
+        tabel = pd.DataFrame([
+            {"File": r["nama"], "Baris": r["baris_bersih"], "Customer": r["customer"], **r["waktu_detik"]}
+            for r in hasil
+        ]).sort_values("File")
+        tabel["total"] = tabel[TAHAP].sum(axis=1)
+        print(tabel.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    print(f"{len(hasil)} file selesai, {len(gagal)} gagal, {time.perf_counter() - mulai:.2f} dtk -> {args.output}")
+    return 1 if gagal else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# Benchmark pipeline Model.py + perhitungan halaman di data sintetis (benchmarks/generator.py).
+# Tiap tahap diukur waktunya, lalu (tanpa --tanpa-memori) dijalankan sekali lagi
+# di bawah tracemalloc untuk puncak memori, supaya overhead tracing tidak ikut di waktu.
+# Hasil ditulis sebagai JSON; --baseline membandingkan dengan hasil lama (exit 1 kalau lebih lambat).
+#
+# Jalankan dari root repo:
+#   python benchmarks/bench_pipeline.py                       # 10k, 1M, 10M baris
+#   python benchmarks/bench_pipeline.py -n 10000 100000 -o hasil.json
+#   python benchmarks/bench_pipeline.py -n 10000 --baseline hasil.json --toleransi 0.25
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Model
+import clv
+from generator import buat_transaksi
+from ingest import baca_transaksi, bersihkan_transaksi
+
+UKURAN_DEFAULT = [10_000, 1_000_000, 10_000_000]
+
+
+def _ukur(fn, memori):
+    gc.collect()
+    t0 = time.perf_counter()
+    hasil = fn()
+    detik = time.perf_counter() - t0
+
+    puncak = None
+    if memori:
+        del hasil
+        gc.collect()
+        tracemalloc.start()
+        hasil = fn()
+        puncak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return hasil, detik, puncak
+
+
+def _tahap(path_csv):
+    # (nama, fungsi(state) -> hasil, key state untuk hasil); urutan = urutan pipeline app
+    return [
+        ("baca_csv", lambda s: baca_transaksi(path_csv), "raw"),
+        ("bersihkan_data", lambda s: Model._bersihkan(s["raw"].copy()), None),
+        ("bersihkan_transaksi", lambda s: bersihkan_transaksi(s["raw"])[0], "clean"),
+        ("hitung_rfm", lambda s: Model._hitung_rfm(s["clean"]), "rfm"),
+        ("segmentasi_sederhana", lambda s: Model.rfm_analisis(s["rfm"]), "rfm_seg"),
+        ("segmentasi_gambar", lambda s: Model.rfm_segmen_gambar(s["rfm"]), None),
+        ("skor_rfm", lambda s: Model.skor_rfm(s["rfm"]), None),
+        ("ringkasan_segmen", lambda s: Model.ringkasan_segmen(s["rfm_seg"]), None),
+        ("gabung_nama", lambda s: Model.gabung_nama(s["rfm_seg"], s["clean"]), "rfm_nama"),
+        ("top_customers", lambda s: Model.top_customers(s["rfm_nama"], 20, per_segmen=True), None),
+        ("index_pencarian", lambda s: Model.buat_index_pencarian(s["rfm_nama"]), "index"),
+        ("filter_segmen", lambda s: Model.filter_segmen(s["rfm_nama"], "Need Attention", "ah", s["index"]), None),
+        ("cluster_rfm", lambda s: Model.cluster_rfm(s["rfm"])[0], None),
+        ("ringkasan_pembelian", lambda s: clv.ringkasan_pembelian(s["clean"]), "pembelian"),
+        ("fit_clv", lambda s: clv.fit_clv(s["pembelian"]), "clv_param"),
+        ("skor_clv", lambda s: clv.skor_clv(s["rfm"], s["pembelian"], s["clv_param"]), None),
+    ]
+
+
+def bench_ukuran(n, memori=True, seed=42):
+    hasil = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path_csv = os.path.join(tmp, f"transaksi_{n}.csv")
+        t0 = time.perf_counter()
+        buat_transaksi(n, seed=seed).to_csv(path_csv, index=False)
+        print(f"[{n:>10}] data sintetis dibuat dalam {time.perf_counter() - t0:.1f} dtk", file=sys.stderr)
+
+        state = {}
+        baris_masuk = n
+        for nama, fn, key in _tahap(path_csv):
+            keluar, detik, puncak = _ukur(lambda: fn(state), memori)
+            baris_keluar = len(keluar) if hasattr(keluar, "__len__") else None
+            hasil.append({
+                "n": n, "tahap": nama, "detik": round(detik, 4),
+                "puncak_mb": None if puncak is None else round(puncak, 1),
+                "baris_masuk": baris_masuk, "baris_keluar": baris_keluar,
+            })
+            print(f"[{n:>10}] {nama:<22} {detik:>9.3f} dtk"
+                  + ("" if puncak is None else f" {puncak:>9.1f} MB"), file=sys.stderr)
+            if key is not None:
+                state[key] = keluar
+                baris_masuk = baris_keluar
+            del keluar
+    return hasil
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _rss_puncak_mb():
+    # Puncak RSS proses (termasuk buffer pyarrow yang tidak terlihat oleh tracemalloc)
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+def bandingkan(hasil, baseline, toleransi):
+    # Regresi = tahap yang lebih lambat dari baseline lebih dari toleransi (mis. 0.25 = 25%)
+    lama = {(r["n"], r["tahap"]): r["detik"] for r in baseline["hasil"]}
+    regresi = []
+    for r in hasil:
+        acuan = lama.get((r["n"], r["tahap"]))
+        # Tahap < 10 ms terlalu berisik untuk dibandingkan
+        if acuan and max(acuan, r["detik"]) >= 0.01 and r["detik"] > acuan * (1 + toleransi):
+            regresi.append({**r, "detik_baseline": acuan, "rasio": round(r["detik"] / acuan, 2)})
+    return regresi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline RFM di data sintetis")
+    parser.add_argument("-n", "--ukuran", type=int, nargs="+", default=UKURAN_DEFAULT, help="jumlah baris transaksi")
+    parser.add_argument("-o", "--output", help="file JSON hasil (default: stdout)")
+    parser.add_argument("--tanpa-memori", action="store_true", help="lewati pengukuran puncak memori")
+    parser.add_argument("--baseline", help="file JSON hasil sebelumnya untuk cek regresi")
+    parser.add_argument("--toleransi", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # Import sklearn/joblib di awal supaya tidak ikut terhitung di cluster_rfm ukuran pertama
+    import joblib  # noqa: F401
+    import sklearn.cluster  # noqa: F401
+
+    hasil = []
+    for n in args.ukuran:
+        hasil.extend(bench_ukuran(n, memori=not args.tanpa_memori, seed=args.seed))
+
+    laporan = {
+        "waktu": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu": os.cpu_count(),
+        "rss_puncak_mb": _rss_puncak_mb(),
+        "hasil": hasil,
+    }
+    teks = json.dumps(laporan, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(teks + "\n")
+    else:
+        print(teks)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regresi = bandingkan(hasil, json.load(f), args.toleransi)
+        for r in regresi:
+            print(f"REGRESI [{r['n']}] {r['tahap']}: {r['detik_baseline']:.3f} -> {r['detik']:.3f} dtk "
+                  f"({r['rasio']}x)", file=sys.stderr)
+        return 1 if regresi else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
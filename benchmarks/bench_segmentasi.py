@@ -0,0 +1,94 @@
+# Benchmark segmentasi: df.apply(axis=1) lama vs Model.segmentasi_rfm (vectorized)
+# Jalankan dari root repo: python benchmarks/bench_segmentasi.py [jumlah_customer ...]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Model import segmentasi_rfm, SEGMENT_RULES_SEDERHANA, SEGMENT_DEFAULT_SEDERHANA
+
+
+# Versi lama dari pages/1_RFM_Analysis.py (acuan hasil & waktu)
+def segment_customer(row):
+    r, f = row['Recency'], row['Frequency']
+    if r <= 30 and f >= 10:
+        return "01-Champion"
+    elif f >= 7:
+        return "02-Loyal Customers"
+    elif r <= 60 and f >= 3:
+        return "03-Potential Loyalists"
+    elif r > 90 and f >= 8:
+        return "04-Can't Lose Them"
+    elif r > 60 and f <= 3:
+        return "05-Need Attention"
+    elif r <= 30 and f == 1:
+        return "06-New Customers"
+    elif r <= 90 and f == 1:
+        return "07-Promising"
+    elif r > 90 and f <= 4:
+        return "08-At Risk"
+    elif r > 60 and f <= 2:
+        return "09-About to Sleep"
+    else:
+        return "10-Hibernating"
+
+
+def assign_segment(row):
+    if row['Recency'] <= 30 and row['Frequency'] >= 4:
+        return "Champion"
+    elif row['Frequency'] >= 3:
+        return "Loyal Customers"
+    elif row['Frequency'] >= 2 and row['Recency'] <= 60:
+        return "Potential Loyalists"
+    elif row['Frequency'] >= 2 and row['Recency'] > 90:
+        return "Can't Lose Them"
+    elif row['Frequency'] == 1 and row['Recency'] > 90:
+        return "At Risk"
+    elif row['Recency'] > 60 and row['Frequency'] == 1:
+        return "About to Sleep"
+    elif row['Recency'] <= 30 and row['Frequency'] == 1:
+        return "New Customers"
+    elif row['Recency'] <= 90 and row['Frequency'] == 1:
+        return "Promising"
+    elif row['Frequency'] <= 2:
+        return "Need Attention"
+    else:
+        return "Others"
+
+
+def buat_rfm_dummy(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Customer_id': np.arange(n).astype(str),
+        'Recency': rng.integers(0, 365, size=n),
+        'Frequency': rng.geometric(0.35, size=n),
+    })
+
+
+def timeit(fn):
+    t0 = time.perf_counter()
+    hasil = fn()
+    return hasil, time.perf_counter() - t0
+
+
+def main(sizes):
+    print(f"{'n':>10} {'rule':>10} {'apply (s)':>10} {'vector (s)':>11} {'speedup':>8}")
+    for n in sizes:
+        df = buat_rfm_dummy(n)
+        kasus = [
+            ('gambar', segment_customer, {}),
+            ('sederhana', assign_segment,
+             {'rules': SEGMENT_RULES_SEDERHANA, 'default': SEGMENT_DEFAULT_SEDERHANA}),
+        ]
+        for nama, fn_lama, kwargs in kasus:
+            lama, t_lama = timeit(lambda: df.apply(fn_lama, axis=1))
+            baru, t_baru = timeit(lambda: segmentasi_rfm(df, **kwargs))
+            assert (lama == baru).all(), f"hasil berbeda untuk rule {nama}"
+            print(f"{n:>10} {nama:>10} {t_lama:>10.3f} {t_baru:>11.4f} {t_lama / t_baru:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10_000, 100_000])
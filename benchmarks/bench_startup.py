@@ -0,0 +1,131 @@
+# Anggaran waktu startup app Streamlit (lewat streamlit.testing AppTest, tanpa browser).
+# Per halaman, di proses Python baru (supaya modul yang sudah di-import halaman lain
+# tidak ikut "menghemat" waktu):
+#   cold         = run pertama tanpa data (import modul app + render awal)
+#   rerun        = run berikutnya di session yang sama (mis. setelah klik widget)
+#   pertama_data = run pertama dengan data_bersih di session (hitung + isi memo)
+#   rerun_data   = rerun dengan data (seharusnya semua dari memo / cache_resource)
+# cold & rerun* dibandingkan dengan anggaran; exit 1 kalau ada yang lewat.
+#
+# Jalankan dari root repo:
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --cold 2 --rerun 0.5 -o startup.json
+#   python benchmarks/bench_startup.py --data assets/sample_transaksi.csv --halaman Home.py pages/1_RFM_Analysis.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HALAMAN = [
+    "Home.py",
+    "pages/1_RFM_Analysis.py",
+    "pages/2_RFM_Insights.py",
+    "pages/3_Clustering.py",
+    "pages/4_Migrasi_Segmen.py",
+    "pages/5_Gudang_Transaksi.py",
+]
+DATA_DEFAULT = os.path.join("assets", "DATASET PT. KREASI PUTRA HOTAMA 2025 - hasil_merge.csv")
+# Anggaran default (detik), di luar import streamlit sendiri yang sudah ada di proses server
+ANGGARAN = {"cold": 3.0, "rerun": 0.5, "rerun_data": 1.0}
+# Halaman yang butuh state dari halaman lain (mis. Insights butuh df_rfm_segment dari Analysis)
+PRASYARAT = {"pages/2_RFM_Insights.py": "pages/1_RFM_Analysis.py"}
+
+
+def _run(at):
+    t0 = time.perf_counter()
+    at.run()
+    detik = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return round(detik, 4)
+
+
+def ukur_halaman(halaman, data, timeout=120):
+    # Dijalankan di proses anak; streamlit di-import dulu (di server sudah ter-import)
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    hasil = {"halaman": halaman}
+
+    at = AppTest.from_file(os.path.join(ROOT, halaman), default_timeout=timeout)
+    hasil["cold"] = _run(at)
+    hasil["rerun"] = _run(at)
+
+    if halaman != "Home.py":
+        from ingest import muat_transaksi
+
+        state = {"data_bersih": muat_transaksi(data)[1]}
+        if halaman in PRASYARAT:
+            pra = AppTest.from_file(os.path.join(ROOT, PRASYARAT[halaman]), default_timeout=timeout)
+            for k, v in state.items():
+                pra.session_state[k] = v
+            _run(pra)
+            state["df_rfm_segment"] = pra.session_state["df_rfm_segment"]
+
+        at = AppTest.from_file(os.path.join(ROOT, halaman), default_timeout=timeout)
+        for k, v in state.items():
+            at.session_state[k] = v
+        hasil["pertama_data"] = _run(at)
+        hasil["rerun_data"] = _run(at)
+    return hasil
+
+
+def cek_anggaran(hasil, anggaran):
+    lewat = []
+    for r in hasil:
+        for kolom, batas in anggaran.items():
+            if r.get(kolom) is not None and r[kolom] > batas:
+                lewat.append({"halaman": r["halaman"], "ukuran": kolom, "detik": r[kolom], "anggaran": batas})
+    return lewat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start & rerun halaman Streamlit vs anggaran waktu")
+    parser.add_argument("--halaman", nargs="+", default=HALAMAN)
+    parser.add_argument("--data", default=DATA_DEFAULT, help="CSV transaksi untuk run dengan data")
+    parser.add_argument("--cold", type=float, default=ANGGARAN["cold"])
+    parser.add_argument("--rerun", type=float, default=ANGGARAN["rerun"])
+    parser.add_argument("--rerun-data", type=float, default=ANGGARAN["rerun_data"])
+    parser.add_argument("-o", "--output", help="file JSON hasil (default: stdout)")
+    parser.add_argument("--anak", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.anak:
+        print(json.dumps(ukur_halaman(args.anak, args.data)))
+        return 0
+
+    hasil = []
+    for halaman in args.halaman:
+        proses = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--anak", halaman, "--data", args.data],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if proses.returncode != 0:
+            print(proses.stderr, file=sys.stderr)
+            return 2
+        r = json.loads(proses.stdout.strip().splitlines()[-1])
+        hasil.append(r)
+        print(f"{halaman:<28} cold {r['cold']:>6.2f}  rerun {r['rerun']:>6.2f}"
+              + (f"  data {r['pertama_data']:>6.2f}  rerun_data {r['rerun_data']:>6.2f}" if "rerun_data" in r else "")
+              + " dtk", file=sys.stderr)
+
+    anggaran = {"cold": args.cold, "rerun": args.rerun, "rerun_data": args.rerun_data}
+    lewat = cek_anggaran(hasil, anggaran)
+    teks = json.dumps({"anggaran": anggaran, "hasil": hasil, "lewat_anggaran": lewat}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(teks + "\n")
+    else:
+        print(teks)
+
+    for r in lewat:
+        print(f"LEWAT ANGGARAN {r['halaman']} {r['ukuran']}: {r['detik']:.2f} > {r['anggaran']:.2f} dtk", file=sys.stderr)
+    return 1 if lewat else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Generator transaksi sintetis dengan schema assets/sample_transaksi.csv
+# (harga format "Rp300.000", Order_id gaya voucher, frekuensi customer miring/long-tail,
+# porsi baris lanjutan tanpa Order_id sama dengan dataset internal).
+# Jalankan dari root repo: python benchmarks/generator.py 1000000 data_1m.csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KATALOG_PATH = os.path.join(ROOT, "assets", "DATASET PT. KREASI PUTRA HOTAMA 2025 - hasil_merge.csv")
+KOLOM = ['Customer_name', 'Customer_id', 'Order_id', 'Product_code', 'Product_Name', 'Quantity', 'Order_date', 'Price']
+_ALFABET = np.frombuffer(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", dtype=np.uint8)
+_NAMA_DEPAN = np.array(["Ahmad", "Siti", "Nur", "Muhammad", "Dewi", "Rizky", "Putri", "Fajar",
+                        "Aisyah", "Budi", "Halim", "Keysha", "Nizam", "Shakila", "ilma", "Riya"])
+_NAMA_BELAKANG = np.array(["", "Hidayat", "Lestari", "Saputra", "Ferdian", "Al hilma",
+                           "Malik", "Syakib", "Rahmawati", "Kurniawan", "Salsabila"])
+
+
+def _path_acuan():
+    return KATALOG_PATH if os.path.exists(KATALOG_PATH) else os.path.join(ROOT, "assets", "sample_transaksi.csv")
+
+
+def muat_katalog():
+    # Produk + harga + bobot popularitas dari dataset internal (fallback: sample)
+    df = pd.read_csv(_path_acuan(), usecols=['Product_code', 'Product_Name', 'Price'])
+    katalog = df.value_counts(dropna=True).reset_index(name='Bobot')
+    katalog['Bobot'] = katalog['Bobot'] / katalog['Bobot'].sum()
+    return katalog
+
+
+def rasio_order_kosong():
+    # Export asli hanya mengisi Order_id di baris pertama tiap order; baris lanjutannya
+    # kosong (diisi ffill saat cleaning). Di dataset internal porsinya ~63%.
+    return float(pd.read_csv(_path_acuan(), usecols=['Order_id'])['Order_id'].isna().mean())
+
+
+def _token(rng, n, panjang=10):
+    idx = rng.integers(0, len(_ALFABET), size=(n, panjang))
+    return _ALFABET[idx].view(f"S{panjang}").ravel().astype(str)
+
+
+def buat_transaksi(n, n_customer=None, seed=42, pct_kosong=0.002, pct_order_kosong=None, tahun=2025):
+    # pct_kosong: Customer_id / Product_code kosong; pct_order_kosong: baris lanjutan
+    # tanpa Order_id (default: porsi di dataset acuan)
+    rng = np.random.default_rng(seed)
+    n_customer = n_customer or max(n // 10, 1)
+
+    # Customer miring: frekuensi mengikuti distribusi Zipf (banyak 1x, sedikit sangat sering)
+    bobot = 1.0 / np.arange(1, n_customer + 1) ** 0.9
+    pelanggan = rng.choice(n_customer, size=n, p=bobot / bobot.sum())
+    id_customer = 1_000_000 + rng.permutation(n_customer)
+    nama_customer = pd.Series(
+        _NAMA_DEPAN[rng.integers(0, len(_NAMA_DEPAN), n_customer)].astype(object) + " "
+        + _NAMA_BELAKANG[rng.integers(0, len(_NAMA_BELAKANG), n_customer)].astype(object)
+    ).str.strip().to_numpy()
+    customer_id = id_customer[pelanggan]
+
+    katalog = muat_katalog()
+    produk = rng.choice(len(katalog), size=n, p=katalog['Bobot'].to_numpy())
+
+    # Tanggal dalam satu tahun, urut seperti export asli, jam tanpa nol di depan ("5:10:42")
+    detik = np.sort(rng.integers(0, 365 * 86400, size=n))
+    waktu = pd.Timestamp(f"{tahun}-01-01") + pd.to_timedelta(detik, unit="s")
+    epoch = (waktu.asi8 // 10**9).astype(np.int64)
+    hari = pd.Series(_tanggal_cepat(detik, tahun))
+    jam = (detik % 86400) // 3600
+    menit_detik = pd.Series(((detik % 3600) // 60).astype(str)).str.zfill(2) + ":" + \
+        pd.Series((detik % 60).astype(str)).str.zfill(2)
+    order_date = hari + " " + pd.Series(jam.astype(str)) + ":" + menit_detik
+
+    # Order_id: "voucher-<cid>-<epoch>-<token>" atau "Voucher-<angka>-<angka>"
+    cid_str = pd.Series(customer_id.astype(str))
+    voucher_app = "voucher-" + cid_str + "-" + pd.Series(epoch.astype(str)) + "-" + pd.Series(_token(rng, n))
+    voucher_promo = "Voucher-" + pd.Series(rng.integers(10_000, 99_999, n).astype(str)) + "-" + \
+        pd.Series(rng.integers(10_000, 99_999, n).astype(str))
+    order_id = voucher_app.where(rng.random(n) < 0.7, voucher_promo)
+
+    df = pd.DataFrame({
+        'Customer_name': nama_customer[pelanggan],
+        'Customer_id': pd.array(customer_id, dtype='Int64'),
+        'Order_id': order_id.to_numpy(dtype=object),
+        'Product_code': pd.array(katalog['Product_code'].to_numpy()[produk], dtype='Int64'),
+        'Product_Name': katalog['Product_Name'].to_numpy()[produk],
+        'Quantity': rng.choice([1, 1, 1, 1, 2, 3], size=n),
+        'Order_date': order_date.to_numpy(dtype=object),
+        'Price': katalog['Price'].to_numpy()[produk],
+    })
+
+    # Sebagian kecil baris kotor (Customer_id / Product_code kosong) + baris lanjutan order
+    for col in ['Customer_id', 'Product_code']:
+        df.loc[rng.random(n) < pct_kosong, col] = pd.NA
+    if pct_order_kosong is None:
+        pct_order_kosong = rasio_order_kosong()
+    df.loc[rng.random(n) < pct_order_kosong, 'Order_id'] = pd.NA
+    return df[KOLOM]
+
+
+def _tanggal_cepat(detik, tahun):
+    # strftime per baris lambat untuk jutaan baris: format per hari unik lalu di-take
+    hari = detik // 86400
+    label = (pd.Timestamp(f"{tahun}-01-01") + pd.to_timedelta(np.arange(hari.max() + 1), unit="D")).strftime("%Y-%m-%d")
+    return np.asarray(label, dtype=object)[hari]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    output = sys.argv[2] if len(sys.argv) > 2 else f"transaksi_sintetis_{n}.csv"
+    buat_transaksi(n).to_csv(output, index=False)
+    print(f"{n} baris -> {output}")
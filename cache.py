@@ -0,0 +1,254 @@
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+from Model import _hitung_rfm
+from ingest import baca_transaksi, bersihkan_transaksi
+from profil import instrumen
+
+# Cache kolumnar (Parquet) untuk data bersih & hasil RFM.
+# Key = hash isi file input, jadi dataset yang sama tidak perlu
+# parsing tanggal/harga ulang; dtype (datetime, float, str) ikut tersimpan.
+# Isinya data customer dari upload, jadi dipangkas tiap kali ada yang disimpan:
+# dataset yang tidak dipakai > UMUR_CACHE dihapus, dan hanya MAKS_DATASET_CACHE
+# dataset terakhir dipakai (mtime diperbarui saat cache hit) yang disimpan.
+CACHE_DIR = os.path.join("assets", "cache")
+CACHE_VERSION = "3"  # naikkan kalau aturan cleaning / RFM berubah
+MAKS_DATASET_CACHE = 20
+UMUR_CACHE = 7 * 24 * 3600  # detik
+
+
+def hash_sumber(sumber, cek=None):
+    # cek: dipanggil tiap blok 1 MB (mis. flag batal pekerjaan.py)
+    h = hashlib.sha1(CACHE_VERSION.encode())
+    if isinstance(sumber, (str, os.PathLike)):
+        with open(sumber, "rb") as f:
+            for blok in iter(lambda: f.read(1 << 20), b""):
+                if cek is not None:
+                    cek()
+                h.update(blok)
+    else:
+        # UploadedFile / BytesIO
+        isi = memoryview(sumber.getvalue())
+        for mulai in range(0, len(isi), 1 << 20):
+            if cek is not None:
+                cek()
+            h.update(isi[mulai:mulai + (1 << 20)])
+    return h.hexdigest()[:16]
+
+
+def _cache_path(key, nama):
+    return os.path.join(CACHE_DIR, f"{key}_{nama}.parquet")
+
+
+def _sentuh(path):
+    # Tandai dipakai (urutan pemangkasan = waktu pakai terakhir)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def pangkas_cache(simpan=(), maks=MAKS_DATASET_CACHE, umur=UMUR_CACHE):
+    # Hapus file cache per dataset (key) yang lebih tua dari umur / di luar maks terbaru.
+    # Key di `simpan` dan dataset bersama yang sedang dimuat proses ini tidak dihapus.
+    try:
+        files = os.listdir(CACHE_DIR)
+    except OSError:
+        return []
+    waktu = {}
+    for f in files:
+        key = f.split("_", 1)[0]
+        try:
+            waktu[key] = max(waktu.get(key, 0.0), os.path.getmtime(os.path.join(CACHE_DIR, f)))
+        except OSError:
+            continue
+    dilindungi = set(simpan) | {entri["key"] for entri in list(_bersama.values())}
+    batas = time.time() - umur
+    terbaru = sorted(waktu, key=waktu.get, reverse=True)
+    hapus = [key for i, key in enumerate(terbaru)
+             if key not in dilindungi and (i >= maks or waktu[key] < batas)]
+    for f in files:
+        if f.split("_", 1)[0] in hapus:
+            try:
+                os.remove(os.path.join(CACHE_DIR, f))
+            except OSError:
+                pass
+    return hapus
+
+
+def muat_cache(key, nama):
+    path = _cache_path(key, nama)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except (ImportError, OSError, ValueError):
+        # pyarrow tidak ada / file rusak -> anggap cache miss
+        return None
+    _sentuh(path)
+    return df
+
+
+def simpan_cache(df, key, nama):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(key, nama)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)  # atomic, aman untuk beberapa session sekaligus
+    except (ImportError, OSError, ValueError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    pangkas_cache(simpan=[key])
+
+
+@instrumen
+def muat_dataset(sumber, cek=None):
+    key = hash_sumber(sumber, cek)
+    df_raw = muat_cache(key, "raw")
+    df_clean = muat_cache(key, "bersih")
+    df_laporan = muat_cache(key, "laporan")
+
+    if df_raw is None or df_clean is None or df_laporan is None:
+        if hasattr(sumber, "seek"):
+            sumber.seek(0)
+        df_raw = baca_transaksi(sumber, cek=cek)
+        if cek is not None:
+            cek()
+        df_clean, laporan = bersihkan_transaksi(df_raw)
+        df_laporan = pd.DataFrame({"Alasan": list(laporan), "Jumlah_Baris": list(laporan.values())})
+        simpan_cache(df_raw, key, "raw")
+        simpan_cache(df_clean, key, "bersih")
+        simpan_cache(df_laporan, key, "laporan")
+
+    return df_raw, df_clean, df_laporan, key
+
+
+@instrumen
+def hitung_rfm_cached(df_clean, key):
+    # Dataset bersama: RFM-nya sudah ada di memori proses (snapshot, dict bisa diubah session lain)
+    for entri in list(_bersama.values()):
+        if entri["key"] == key:
+            return entri["rfm"]
+    df_rfm = muat_cache(key, "rfm")
+    if df_rfm is None:
+        df_rfm = _hitung_rfm(df_clean)
+        simpan_cache(df_rfm, key, "rfm")
+    return df_rfm
+
+
+@instrumen
+def fit_clv_cached(df_pembelian, key):
+    # Parameter BG/NBD + Gamma-Gamma per dataset (7 baris), fit hanya sekali per file input
+    # (scipy di-import di clv saat fit, bukan saat app start)
+    df_param = muat_cache(key, "clv_param")
+    if df_param is None:
+        from clv import fit_clv
+
+        df_param = fit_clv(df_pembelian)
+        simpan_cache(df_param, key, "clv_param")
+    return df_param
+
+
+# Dataset di disk server (mis. dataset internal): dimuat, dibersihkan & di-RFM sekali
+# per proses lalu dipakai bersama semua session (read-only!), jadi N user = satu
+# salinan memori & satu parse. Disimpan sebagai Arrow IPC dan dibuka lewat memory
+# map: kolom numerik jadi view read-only ke file (halaman page cache OS, dibagi juga
+# antar proses server), hanya kolom string/kategori yang disalin ke memori proses.
+# Validasi tiap akses: (mtime, size) file; kalau berubah, hash isi dicek ulang dan
+# data hanya dimuat ulang kalau isinya memang beda.
+_bersama = {}
+_lock_bersama = threading.Lock()
+BAGIAN_BERSAMA = ("raw", "bersih", "laporan", "rfm")
+
+
+def _arrow_path(key, nama):
+    return os.path.join(CACHE_DIR, f"{key}_{nama}.arrow")
+
+
+def _muat_arrow(key, nama):
+    path = _arrow_path(key, nama)
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+
+        tabel = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        df = tabel.to_pandas(split_blocks=True)
+    except (ImportError, OSError, ValueError):
+        return None
+    _sentuh(path)
+    return df
+
+
+def _simpan_arrow(df, key, nama):
+    path = _arrow_path(key, nama)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        import pyarrow as pa
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tabel = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp, "wb") as f:
+            with pa.ipc.new_file(f, tabel.schema) as writer:
+                writer.write_table(tabel)
+        os.replace(tmp, path)
+    except (ImportError, OSError, ValueError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    pangkas_cache(simpan=[key])
+
+
+def _muat_bersama(path, key, cek=None):
+    bagian = {nama: _muat_arrow(key, nama) for nama in BAGIAN_BERSAMA}
+    if any(df is None for df in bagian.values()):
+        df_raw, df_clean, df_laporan, _ = muat_dataset(path, cek)
+        df_rfm = muat_cache(key, "rfm")
+        if df_rfm is None:
+            if cek is not None:
+                cek()
+            df_rfm = _hitung_rfm(df_clean)
+            simpan_cache(df_rfm, key, "rfm")
+        bagian = dict(zip(BAGIAN_BERSAMA, (df_raw, df_clean, df_laporan, df_rfm)))
+        for nama, df in bagian.items():
+            _simpan_arrow(df, key, nama)
+            # Dibuka ulang dari file supaya yang dibagi adalah versi memory-mapped
+            df_mmap = _muat_arrow(key, nama)
+            if df_mmap is not None:
+                bagian[nama] = df_mmap
+    return {"key": key, **bagian}
+
+
+@instrumen
+def dataset_bersama(path, cek=None):
+    # cek: dipanggil selama menunggu lock & di antara blok/tahap; kalau ia melempar exception
+    # pemuatan berhenti dan tidak ada entri yang disimpan (session lain memuat ulang nanti)
+    info = os.stat(path)
+    tanda = (info.st_mtime_ns, info.st_size)
+    # Satu lock: session yang datang bersamaan menunggu satu parse, bukan parse sendiri-sendiri
+    while not _lock_bersama.acquire(timeout=0.2):
+        if cek is not None:
+            cek()
+    try:
+        entri = _bersama.get(path)
+        if entri is not None and entri["tanda"] == tanda:
+            return entri
+        key = hash_sumber(path, cek)
+        if entri is None or entri["key"] != key:
+            entri = _muat_bersama(path, key, cek)
+        entri["tanda"] = tanda
+        _bersama[path] = entri
+        return entri
+    finally:
+        _lock_bersama.release()
+
+
+def dipakai_bersama(df):
+    # True kalau df adalah salah satu DataFrame dataset bersama (bukan milik session)
+    return any(df is entri[nama] for entri in list(_bersama.values()) for nama in BAGIAN_BERSAMA)
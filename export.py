@@ -0,0 +1,55 @@
+import gzip
+import io
+
+import streamlit as st
+
+from memo import memo_dataset
+
+# Ekspor untuk tombol download: serialisasi di memori (tidak menulis ke assets/),
+# baru dijalankan saat tombol diklik, dan bytes-nya di-cache per dataset + format.
+# Jadi tidak ada tulis file per rerun dan tidak ada file bersama antar session.
+FORMAT_UNDUH = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/octet-stream"),
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def serialisasi(df, fmt="CSV"):
+    if fmt == "CSV":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "CSV (gzip)":
+        return gzip.compress(df.to_csv(index=False).encode("utf-8"))
+
+    buffer = io.BytesIO()
+    if fmt == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "Excel":
+        if len(df) >= 1_048_576:
+            raise ValueError("Data melebihi batas baris Excel, pilih CSV / Parquet")
+        df.to_excel(buffer, index=False, engine="openpyxl")
+    else:
+        raise ValueError(f"Format unduhan tidak dikenal: {fmt}")
+    return buffer.getvalue()
+
+
+_serialisasi_cached = memo_dataset(maxsize=32)(serialisasi)
+
+
+def pilih_format():
+    # Satu pilihan format per session, ditaruh di sidebar
+    return st.sidebar.selectbox("Format unduhan", options=list(FORMAT_UNDUH), key="format_unduh")
+
+
+def tombol_unduh(label, df, nama_file, key_data):
+    # key_data: identitas isi df, mis. (fp, "rfm_result") atau (fp, segment, search_q)
+    fmt = st.session_state.get("format_unduh", "CSV")
+    ext, mime = FORMAT_UNDUH[fmt]
+    st.download_button(
+        label,
+        lambda: _serialisasi_cached(key_data, df, fmt),
+        file_name=f"{nama_file}{ext}",
+        mime=mime,
+        key=f"unduh_{nama_file}"
+    )
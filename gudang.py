@@ -0,0 +1,267 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from Model import _lengkapi_rfm
+from profil import instrumen
+
+# Gudang transaksi persisten untuk histori multi-tahun: Parquet dipartisi per bulan
+# Order_date (assets/gudang/Bulan=202501/...), schema tetap, diurutkan per tanggal
+# supaya statistik row group ikut menyaring rentang tanggal di dalam bulan.
+# Dibaca lewat pyarrow.dataset dengan memory map: hanya partisi bulan di rentang
+# yang diminta dan hanya kolom yang dipakai yang dibaca (RFM cukup Customer_id,
+# Order_id, Order_date, Total_Transaksi; Order_id hanya dibaca sebagai flag terisi),
+# diagregasi per file, jadi memori ~ jumlah customer, bukan jumlah transaksi.
+# Nama produk & harga mentah tidak pernah dimuat untuk RFM.
+# Export bulanan yang overlap: baris yang sudah ada di partisi bulannya (kunci
+# KOLOM_KUNCI) tidak ditulis ulang, jadi Monetary / Frequency tidak terhitung dobel.
+GUDANG_DIR = os.path.join("assets", "gudang")
+SCHEMA_GUDANG = {
+    'Customer_name': 'string',
+    'Customer_id': 'int64',
+    'Order_id': 'string',
+    'Product_code': 'int64',
+    'Product_Name': 'string',
+    'Quantity': 'double',
+    'Order_date': 'timestamp[ns]',
+    'Price_clean': 'double',
+    'Total_Transaksi': 'double',
+}
+KOLOM_RFM = ['Customer_id', 'Order_id', 'Order_date', 'Total_Transaksi']
+KOLOM_KUNCI = ['Order_id', 'Customer_id', 'Product_Name', 'Order_date', 'Price_clean']
+BATAS_PARSIAL = 2_000_000  # baris agregat parsial sebelum digabung (batas memori)
+
+
+def _partisi():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("Bulan", pa.int32())]), flavor="hive")
+
+
+def _dataset(root):
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+
+    return ds.dataset(
+        os.path.abspath(root), format="parquet", partitioning=_partisi(),
+        filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
+
+
+def _bulan(tanggal):
+    # Timestamp -> 202501
+    return tanggal.year * 100 + tanggal.month
+
+
+def ada_gudang(root=GUDANG_DIR):
+    return os.path.isdir(root) and any(
+        f.endswith(".parquet") for _, _, files in os.walk(root) for f in files
+    )
+
+
+def versi_gudang(root=GUDANG_DIR):
+    # Berubah setiap ada file yang ditambah / ditimpa (dipakai sebagai key memo)
+    h = hashlib.sha1()
+    for folder, _, files in sorted(os.walk(root)):
+        for f in sorted(files):
+            info = os.stat(os.path.join(folder, f))
+            h.update(f"{folder}/{f}:{info.st_size}:{info.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def _hash_kunci(df):
+    # Satu uint64 per baris dari KOLOM_KUNCI, dinormalisasi supaya data baru (categorical,
+    # string arrow) dan data yang dibaca ulang dari Parquet (object) memberi hash yang sama
+    kunci = pd.DataFrame({
+        'Order_id': df['Order_id'].astype(object).where(df['Order_id'].notna(), '').astype(str),
+        'Customer_id': df['Customer_id'].astype('int64'),
+        'Product_Name': df['Product_Name'].astype(object).where(df['Product_Name'].notna(), '').astype(str),
+        'Order_date': df['Order_date'].astype('datetime64[ns]').astype('int64'),
+        'Price_clean': df['Price_clean'].astype('float64'),
+    })
+    return pd.util.hash_pandas_object(kunci, index=False).to_numpy()
+
+
+def _baris_baru(df, root):
+    # Mask baris df yang belum ada di gudang. Baris kembar dihitung per kemunculan
+    # (3 baris identik di export baru vs 2 di gudang -> 1 yang ditulis)
+    if not ada_gudang(root) or not all(kol in df.columns for kol in KOLOM_KUNCI):
+        return np.ones(len(df), dtype=bool)
+    import pyarrow.dataset as ds
+
+    dataset = _dataset(root)
+    kolom = [kol for kol in KOLOM_KUNCI if kol in dataset.schema.names]
+    if kolom != KOLOM_KUNCI:
+        return np.ones(len(df), dtype=bool)
+    bulan = [int(b) for b in df['Bulan'].unique()]
+    lama = dataset.to_table(columns=kolom, filter=ds.field("Bulan").isin(bulan)).to_pandas()
+    if lama.empty:
+        return np.ones(len(df), dtype=bool)
+    jumlah_lama = pd.Series(_hash_kunci(lama)).value_counts()
+    h = pd.Series(_hash_kunci(df))
+    urutan = h.groupby(h).cumcount().to_numpy()
+    return urutan >= h.map(jumlah_lama).fillna(0).to_numpy()
+
+
+class _KunciGudang:
+    # Lock antar proses (batch.py menyimpan dari beberapa proses sekaligus);
+    # tanpa fcntl (Windows) lock dilewati
+    def __init__(self, root):
+        self.path = os.path.join(root, ".lock")
+        self.f = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        self.f = open(self.path, "a")
+        fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.f is not None:
+            self.f.close()  # lock ikut lepas saat file ditutup
+
+
+@instrumen
+def simpan_transaksi(df_clean, root=GUDANG_DIR):
+    # Tambah data bersih ke gudang. Baris yang sudah ada di partisi bulannya dilewati
+    # (export overlap), nama file = hash isi batch yang tersisa.
+    df = pd.DataFrame({
+        kol: df_clean[kol].astype(object) if isinstance(df_clean[kol].dtype, pd.CategoricalDtype) else df_clean[kol]
+        for kol in SCHEMA_GUDANG if kol in df_clean.columns
+    })
+    df = df.sort_values('Order_date', kind='stable')
+    df['Bulan'] = _bulan(df['Order_date'].dt).astype('int32')
+    os.makedirs(root, exist_ok=True)
+    with _KunciGudang(root):
+        baru = _baris_baru(df, root)
+        dilewati = int((~baru).sum())
+        df = df[baru]
+        if df.empty:
+            return {"batch": None, "baris": 0, "dilewati": dilewati, "bulan": []}
+        return {**_tulis_batch(df, root), "dilewati": dilewati}
+
+
+def _tulis_batch(df, root):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = pa.schema(
+        [(kol, pa.type_for_alias(tipe)) for kol, tipe in SCHEMA_GUDANG.items() if kol in df.columns]
+        + [("Bulan", pa.int32())]
+    )
+    tabel = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    batch = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:12]
+    ds.write_dataset(
+        tabel, os.path.abspath(root), format="parquet", partitioning=_partisi(),
+        basename_template=f"batch-{batch}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=256_000,
+    )
+    return {"batch": batch, "baris": len(df), "bulan": sorted(df['Bulan'].unique().tolist())}
+
+
+def _filter(mulai=None, sampai=None):
+    # Rentang [mulai, sampai); partisi Bulan disaring dulu, lalu Order_date per row group
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    kondisi = []
+    if mulai is not None:
+        mulai = pd.Timestamp(mulai).as_unit('ns')
+        kondisi += [ds.field("Bulan") >= _bulan(mulai),
+                    ds.field("Order_date") >= pa.scalar(mulai.value, pa.timestamp("ns"))]
+    if sampai is not None:
+        sampai = pd.Timestamp(sampai).as_unit('ns')
+        kondisi += [ds.field("Bulan") <= _bulan(sampai),
+                    ds.field("Order_date") < pa.scalar(sampai.value, pa.timestamp("ns"))]
+    filter_ = None
+    for k in kondisi:
+        filter_ = k if filter_ is None else filter_ & k
+    return filter_
+
+
+def _potongan(kolom, mulai, sampai, root, flag_terisi=()):
+    # Satu DataFrame per file (partisi bulan x batch), hanya kolom yang diminta.
+    # Kolom di flag_terisi diganti boolean "tidak kosong" sebelum ke pandas (string tidak dimuat)
+    import pyarrow.compute as pc
+
+    dataset = _dataset(root)
+    filter_ = _filter(mulai, sampai)
+    for fragmen in dataset.get_fragments(filter=filter_):
+        tabel = fragmen.to_table(schema=dataset.schema, columns=kolom, filter=filter_)
+        for kol in flag_terisi:
+            tabel = tabel.set_column(tabel.schema.get_field_index(kol), kol, pc.is_valid(tabel[kol]))
+        if flag_terisi:
+            # Metadata pandas masih mencatat dtype lama (string) untuk kolom flag
+            tabel = tabel.replace_schema_metadata(None)
+        if tabel.num_rows:
+            yield tabel.to_pandas()
+
+
+@instrumen
+def info_gudang(root=GUDANG_DIR):
+    # Jumlah baris & rentang tanggal per bulan (hanya kolom Order_date yang dibaca)
+    baris = [
+        (int(df['Order_date'].dt.year.iloc[0] * 100 + df['Order_date'].dt.month.iloc[0]),
+         len(df), df['Order_date'].min(), df['Order_date'].max())
+        for df in _potongan(['Order_date'], None, None, root)
+    ]
+    info = pd.DataFrame(baris, columns=['Bulan', 'Baris', 'Order_date_min', 'Order_date_max'])
+    return info.groupby('Bulan').agg(
+        Baris=('Baris', 'sum'), Order_date_min=('Order_date_min', 'min'), Order_date_max=('Order_date_max', 'max')
+    ).reset_index()
+
+
+@instrumen
+def baca_gudang(kolom=KOLOM_RFM, mulai=None, sampai=None, root=GUDANG_DIR):
+    potongan = list(_potongan(list(kolom), mulai, sampai, root))
+    if not potongan:
+        return pd.DataFrame(columns=list(kolom))
+    return pd.concat(potongan, ignore_index=True)
+
+
+def _gabung_parsial(parsial):
+    df = pd.concat(parsial)
+    return df.groupby(level=0).agg(
+        {'Frequency': 'sum', 'Total_Transaksi': 'sum', 'Last_Order_Date': 'max'}
+    )
+
+
+@instrumen
+def hitung_rfm_gudang(mulai=None, sampai=None, root=GUDANG_DIR):
+    # Sama dengan Model._hitung_rfm (Frequency = jumlah Order_id terisi), tapi
+    # diagregasi per file lalu digabung, tanpa memuat seluruh histori sekaligus
+    parsial, n = [], 0
+    for df in _potongan(KOLOM_RFM, mulai, sampai, root, flag_terisi=['Order_id']):
+        parsial.append(df.groupby('Customer_id').agg(
+            Frequency=('Order_id', 'sum'),
+            Total_Transaksi=('Total_Transaksi', 'sum'),
+            Last_Order_Date=('Order_date', 'max'),
+        ))
+        n += len(parsial[-1])
+        if n > BATAS_PARSIAL:
+            parsial = [_gabung_parsial(parsial)]
+            n = len(parsial[0])
+
+    if not parsial:
+        return pd.DataFrame(columns=['Customer_id', 'Frequency', 'Total_Transaksi',
+                                     'Last_Order_Date', 'Recency', 'Avg_Transaction'])
+    df_agg = _gabung_parsial(parsial).sort_index().rename_axis('Customer_id').reset_index()
+    total = df_agg['Total_Transaksi'].to_numpy()
+    if (total == np.round(total)).all():
+        df_agg['Total_Transaksi'] = total.astype('int64')
+    return _lengkapi_rfm(df_agg, df_agg['Last_Order_Date'].max())
+
+
+@instrumen
+def nama_customer_gudang(mulai=None, sampai=None, root=GUDANG_DIR):
+    # Customer_id -> nama terakhir di rentang (untuk gabung_nama), tanpa kolom lain
+    df = baca_gudang(['Customer_id', 'Customer_name'], mulai, sampai, root)
+    return df.drop_duplicates('Customer_id', keep='last').reset_index(drop=True)
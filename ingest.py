@@ -0,0 +1,165 @@
+import pandas as pd
+
+from profil import instrumen
+
+# Ingestion CSV transaksi dengan schema eksplisit.
+# Dibanding pd.read_csv + bersihkan_data: dtype sudah ditentukan saat baca
+# (tanpa float -> int -> str untuk Customer_id), tanggal diparse dengan format
+# tetap, harga Rupiah diparse per nilai unik, dan baris yang dibuang dilaporkan.
+SCHEMA_TRANSAKSI = {
+    'Customer_name': 'object',
+    'Customer_id': 'float64',   # float dulu supaya baris kosong (NaN) tetap terbaca
+    'Order_id': 'object',
+    'Product_code': 'Int64',
+    'Product_Name': 'category',
+    'Quantity': 'float64',
+    'Order_date': 'object',
+    'Price': 'object',
+}
+FORMAT_TANGGAL = "%Y-%m-%d %H:%M:%S"  # contoh: 2025-01-01 5:10:42
+BLOK_BACA = 1 << 24  # 16 MB per blok saat baca bertahap (bisa dibatalkan)
+# Kolom yang dipakai bersihkan_transaksi (Customer_name & Product_* boleh tidak ada)
+KOLOM_WAJIB = ['Customer_id', 'Order_id', 'Quantity', 'Order_date', 'Price']
+
+
+def _baca_per_blok(sumber, cek, ukuran_blok=BLOK_BACA):
+    # CSV dibaca per blok lewat pyarrow supaya cek() (mis. flag batal) jalan di antara blok
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    tipe = {kol: pa.float64() if tipe == 'float64' else pa.int64() if tipe == 'Int64' else pa.string()
+            for kol, tipe in SCHEMA_TRANSAKSI.items()}
+    reader = pacsv.open_csv(
+        sumber, read_options=pacsv.ReadOptions(block_size=ukuran_blok),
+        convert_options=pacsv.ConvertOptions(column_types=tipe, strings_can_be_null=True)
+    )
+    blok = []
+    for batch in reader:
+        cek()
+        blok.append(batch)
+    df = pa.Table.from_batches(blok, schema=reader.schema).to_pandas()
+    return df.astype({kol: tipe for kol, tipe in SCHEMA_TRANSAKSI.items() if kol in df.columns})
+
+
+@instrumen
+def baca_transaksi(sumber, engine="pyarrow", cek=None):
+    if cek is not None:
+        try:
+            return _baca_per_blok(sumber, cek)
+        except (ImportError, ValueError):
+            # pyarrow tidak ada / kolom tambahan berubah tipe antar blok -> baca sekaligus
+            if hasattr(sumber, "seek"):
+                sumber.seek(0)
+    try:
+        return pd.read_csv(sumber, dtype=SCHEMA_TRANSAKSI, engine=engine)
+    except ImportError:
+        # pyarrow belum terpasang -> engine bawaan pandas
+        if hasattr(sumber, "seek"):
+            sumber.seek(0)
+        return pd.read_csv(sumber, dtype=SCHEMA_TRANSAKSI)
+
+
+def cek_kolom_transaksi(df):
+    # Pesan yang bisa dibaca user, bukan KeyError 'Price' dari tengah pembersihan
+    hilang = [kol for kol in KOLOM_WAJIB if kol not in df.columns]
+    if hilang:
+        raise ValueError(f"kolom {', '.join(hilang)} tidak ditemukan di file transaksi")
+
+
+@instrumen
+def parse_rupiah(harga):
+    # "Rp300.000" -> 300000.0, "Rp12.500,50" -> 12500.5
+    # Nilai harga di katalog sedikit, jadi string cukup dibersihkan per nilai unik
+    kode, unik = pd.factorize(harga, use_na_sentinel=True)
+    if len(unik) == 0:
+        # Semua harga kosong/NaN: take() pada array kosong akan IndexError
+        return pd.Series(float('nan'), index=harga.index, name=harga.name, dtype='float64')
+    unik = pd.Series(unik).astype(str)
+    angka = pd.to_numeric(
+        unik.str.replace(r'[Rp.\s]', '', regex=True).str.replace(',', '.', regex=False),
+        errors='coerce'
+    ).to_numpy(dtype='float64')
+    hasil = angka.take(kode, mode='clip')
+    hasil[kode < 0] = float('nan')
+    return pd.Series(hasil, index=harga.index, name=harga.name)
+
+
+@instrumen
+def parse_tanggal(tanggal):
+    hasil = pd.to_datetime(tanggal, format=FORMAT_TANGGAL, errors='coerce')
+    # Fallback untuk file upload yang formatnya beda (hanya baris yang gagal)
+    gagal = hasil.isna() & tanggal.notna()
+    if gagal.any():
+        hasil[gagal] = pd.to_datetime(tanggal[gagal], format='mixed', errors='coerce')
+    return hasil
+
+
+def _ke_int_jika_bulat(s):
+    # Rupiah & quantity umumnya bulat: simpan sebagai int64 seperti hasil read_csv biasa
+    nilai = s.to_numpy(dtype='float64')
+    if len(nilai) and (nilai == nilai.round()).all():
+        return s.astype('int64')
+    return s
+
+
+@instrumen
+def bersihkan_transaksi(df):
+    # Aturan sama dengan Model.bersihkan_data, plus laporan baris yang dibuang
+    cek_kolom_transaksi(df)
+    df = df.copy()
+    df['Price_clean'] = parse_rupiah(df['Price'])
+    df['Order_id'] = df['Order_id'].ffill()
+    df['Order_date'] = parse_tanggal(df['Order_date'])
+    total = df['Quantity'] * df['Price_clean']
+
+    # Alasan dicek berurutan, tiap baris hanya dihitung di alasan pertamanya
+    alasan = [
+        ("Customer_id kosong", df['Customer_id'].isna()),
+        ("Order_date tidak valid", df['Order_date'].isna()),
+        ("Price tidak valid", df['Price_clean'].isna()),
+        ("Total_Transaksi <= 0", ~(total > 0)),
+    ]
+    laporan = {}
+    dibuang = pd.Series(False, index=df.index)
+    for nama, mask in alasan:
+        laporan[nama] = int((mask & ~dibuang).sum())
+        dibuang |= mask
+
+    df = df[~dibuang]
+    df['Customer_id'] = df['Customer_id'].astype('int64')
+    df['Quantity'] = _ke_int_jika_bulat(df['Quantity'])
+    df['Price_clean'] = _ke_int_jika_bulat(df['Price_clean'])
+    df['Total_Transaksi'] = df['Quantity'] * df['Price_clean']
+    return kompak_transaksi(df), laporan
+
+
+@instrumen
+def kompak_transaksi(df):
+    # Representasi hemat memori untuk data_bersih di session:
+    # nama & produk jadi categorical, Order_id string arrow,
+    # angka kecil di-downcast, dan string harga mentah dibuang setelah diparse
+    df = df.drop(columns=['Price'], errors='ignore')
+    for col in ['Customer_name', 'Product_Name']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'Order_id' in df.columns:
+        try:
+            df['Order_id'] = df['Order_id'].astype('string[pyarrow]')
+        except ImportError:
+            pass
+    for col in ['Product_code', 'Quantity']:
+        if col in df.columns and not df[col].isna().any():
+            df[col] = pd.to_numeric(df[col].astype('int64'), downcast='integer')
+    return df
+
+
+def ukuran_memori(df):
+    # Byte sebenarnya (termasuk isi string), bukan hanya pointer
+    return int(df.memory_usage(deep=True).sum())
+
+
+@instrumen
+def muat_transaksi(sumber, engine="pyarrow"):
+    df_raw = baca_transaksi(sumber, engine=engine)
+    df_clean, laporan = bersihkan_transaksi(df_raw)
+    return df_raw, df_clean, laporan
@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+import Model
+import cache as cache_parquet
+import clv
+import gudang
+from ingest import ukuran_memori
+
+# Memoization per dataset untuk pipeline Home -> Analysis -> Insights.
+# Key = fingerprint isi data_bersih (+ argumen lain), bukan DataFrame-nya,
+# jadi rerun karena widget (selectbox, search) tidak menghitung ulang apa pun.
+# Hasil di-cache bersama (read-only!) dan dibatasi dengan LRU.
+MAXSIZE_DEFAULT = 8
+
+_lock = threading.Lock()
+
+
+def fingerprint(df):
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    h = hashlib.sha1(hashes.tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()[:16]
+
+
+def fingerprint_session(key="data_bersih"):
+    # Hash dihitung sekali per objek DataFrame di session, bukan per rerun
+    df = st.session_state[key]
+    fp_key = f"_fp_{key}"
+    simpanan = st.session_state.get(fp_key)
+    if simpanan is not None and simpanan[0]() is df:
+        return simpanan[1]
+
+    fp = fingerprint(df)
+    st.session_state[fp_key] = (weakref.ref(df), fp)
+    return fp
+
+
+def _bagian_key(args, kwargs):
+    # DataFrame/Series sudah terwakili oleh fingerprint, tidak ikut di-hash
+    data = (pd.DataFrame, pd.Series)
+    return (
+        tuple(a for a in args if not isinstance(a, data)),
+        tuple((k, v) for k, v in sorted(kwargs.items()) if not isinstance(v, data)),
+    )
+
+
+def jejak_memori_session():
+    # Ukuran (MB) tiap DataFrame yang disimpan di session ini
+    # (dataset bersama tidak dihitung, satu salinannya dipakai semua session)
+    return {
+        key: ukuran_memori(nilai) / 1e6
+        for key, nilai in st.session_state.items()
+        if isinstance(nilai, pd.DataFrame) and not cache_parquet.dipakai_bersama(nilai)
+    }
+
+
+def memo_dataset(maxsize=MAXSIZE_DEFAULT):
+    # Fungsi yang dibungkus dipanggil sebagai fn(fp, *args);
+    # key = fp + argumen non-DataFrame.
+    def decorator(fn):
+        cache = OrderedDict()
+
+        @functools.wraps(fn)
+        def wrapper(fp, *args, **kwargs):
+            key = (fp,) + _bagian_key(args, kwargs)
+            with _lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+
+            hasil = fn(*args, **kwargs)
+
+            with _lock:
+                cache[key] = hasil
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return hasil
+
+        def cache_clear():
+            with _lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = lambda: {"size": len(cache), "maxsize": maxsize}
+        return wrapper
+
+    return decorator
+
+
+# Versi ter-memo dari fungsi Model.py & tabel turunan halaman.
+# Dipanggil dengan fingerprint dulu, mis. hitung_rfm(fp, df_clean).
+# (versi tanpa menulis assets/rfm_result.csv: file di repo tidak boleh ditimpa tiap session)
+hitung_rfm = memo_dataset()(Model._hitung_rfm)
+hitung_rfm_cached = memo_dataset()(cache_parquet.hitung_rfm_cached)
+rfm_analisis = memo_dataset()(Model.rfm_analisis)
+ringkasan_segmen = memo_dataset()(Model.ringkasan_segmen)
+rfm_segmen_gambar = memo_dataset()(Model.rfm_segmen_gambar)
+batas_skor_rfm = memo_dataset()(Model.batas_skor_rfm)
+skor_rfm = memo_dataset()(Model.skor_rfm)
+distribusi_segmen = memo_dataset()(Model.distribusi_segmen)
+ukuran_segmen_treemap = memo_dataset()(Model.ukuran_segmen_treemap)
+histogram_rfm = memo_dataset(maxsize=32)(Model.histogram_rfm)
+gabung_nama = memo_dataset()(Model.gabung_nama)
+ringkasan_rfm = memo_dataset()(Model.ringkasan_rfm)
+daftar_segmen = memo_dataset()(Model.daftar_segmen)
+top_customers = memo_dataset(maxsize=16)(Model.top_customers)
+index_pencarian = memo_dataset()(Model.buat_index_pencarian)
+# Kombinasi segment x kata kunci bisa banyak, jadi slot-nya lebih besar
+filter_segmen = memo_dataset(maxsize=64)(Model.filter_segmen)
+cluster_rfm = memo_dataset()(Model.cluster_rfm)
+ringkasan_cluster = memo_dataset()(Model.ringkasan_cluster)
+sweep_k = memo_dataset(maxsize=4)(Model.sweep_k)
+# Snapshot bulanan: tabel long (customer x snapshot), jadi slot-nya kecil
+hitung_rfm_snapshot = memo_dataset(maxsize=4)(Model.hitung_rfm_snapshot)
+segmentasi_snapshot = memo_dataset(maxsize=4)(Model.segmentasi_snapshot)
+ukuran_segmen_snapshot = memo_dataset()(Model.ukuran_segmen_snapshot)
+matriks_transisi = memo_dataset(maxsize=32)(Model.matriks_transisi)
+# Churn & CLV (clv.py): parameter di-fit sekali per dataset, skor per (dataset, horizon)
+ringkasan_pembelian = memo_dataset(maxsize=4)(clv.ringkasan_pembelian)
+fit_clv = memo_dataset()(clv.fit_clv)
+fit_clv_cached = memo_dataset()(cache_parquet.fit_clv_cached)
+skor_clv = memo_dataset(maxsize=4)(clv.skor_clv)
+ringkasan_clv = memo_dataset(maxsize=16)(clv.ringkasan_clv)
+berisiko_churn = memo_dataset(maxsize=16)(clv.berisiko_churn)
+
+
+# Rekomendasi produk per (dataset, dasar grup); objek Rekomendasi dipakai bersama (read-only)
+# (modul rekomendasi + scipy baru di-import saat pertama dipakai, bukan saat app start)
+@memo_dataset(maxsize=4)
+def rekomendasi(*args, **kwargs):
+    from rekomendasi import bangun_rekomendasi
+
+    return bangun_rekomendasi(*args, **kwargs)
+
+
+# Gudang transaksi (gudang.py): key = versi_gudang() (berubah saat ada batch baru) + rentang tanggal
+hitung_rfm_gudang = memo_dataset()(gudang.hitung_rfm_gudang)
+nama_customer_gudang = memo_dataset(maxsize=4)(gudang.nama_customer_gudang)
+info_gudang = memo_dataset(maxsize=2)(gudang.info_gudang)
@@ -1,21 +1,22 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-from Model import hitung_rfm
+import aset
+import memo
+import profil
+from export import pilih_format, tombol_unduh
+from Model import KOLOM_RINGKASAN, KOLOM_SKOR, statistik_segmen, tabel_batas_skor, tabel_segmen_gambar
 
 # Konfigurasi halaman
-st.set_page_config(
-    page_title="Qaraa Segmentation App",
-    page_icon="assets/favicon.png",
-    layout="wide"
-)
+aset.konfigurasi_halaman("RFM Analysis")
 
 with st.sidebar:
-    st.image("assets/favicon.png", width=150)
+    st.image(aset.favicon(), width=150)
     st.markdown("Qaraa Segmentation App")
+    if "data_bersih" in st.session_state:
+        st.caption(f"💾 Memori session: {sum(memo.jejak_memori_session().values()):.1f} MB")
+    pilih_format()
+    profil.mulai_halaman("rfm_analysis")
 
-st.set_page_config(page_title="RFM Analysis", layout="wide")
 st.title("📦 RFM Analysis")
 
 # Validasi data
@@ -26,39 +27,37 @@ if "data_bersih" not in st.session_state:
 # Ambil data bersih
 df_clean = st.session_state["data_bersih"]
 
-# Hitung RFM
-df_rfm = hitung_rfm(df_clean)
+with profil.tahap("Hitung RFM (fingerprint + memo)") as info:
+    # Fingerprint dataset: semua tabel di bawah di-memo per dataset
+    fp = memo.fingerprint_session()
+
+    # Hitung RFM (pakai cache Parquet kalau dataset sudah dikenal)
+    if "data_key" in st.session_state:
+        df_rfm = memo.hitung_rfm_cached(fp, df_clean, st.session_state["data_key"])
+    else:
+        df_rfm = memo.hitung_rfm(fp, df_clean)
+    info["baris_keluar"] = len(df_rfm)
 
 st.success("✅ Data berhasil dihitung RFM-nya.")
 
-# Tampilkan tabel RFM
-st.subheader("📟 Data RFM")
-st.dataframe(df_rfm.head(51), use_container_width=True)
+with profil.tahap("Tabel RFM"):
+    # Tampilkan tabel RFM
+    st.subheader("📟 Data RFM")
+    st.dataframe(df_rfm.head(51), use_container_width=True)
 
-# Info tambahan
-st.markdown(f"📌 Total pelanggan tersegmentasi: **{df_rfm.shape[0]} pelanggan**")
+    # Info tambahan
+    st.markdown(f"📌 Total pelanggan tersegmentasi: **{df_rfm.shape[0]} pelanggan**")
 
 # Tombol download
 st.markdown("---")
 st.subheader("⬇️ Unduh Data")
 
+# Serialisasi di memori, baru dibuat saat tombol diklik (format dipilih di sidebar)
 col1, col2 = st.columns(2)
 with col1:
-    with open("assets/rfm_result.csv", "rb") as f:
-        st.download_button(
-            "📥 Download RFM (CSV)",
-            f,
-            file_name="rfm_result.csv",
-            mime="text/csv"
-        )
+    tombol_unduh("📥 Download RFM", df_rfm, "rfm_result", (fp, "rfm_result"))
 with col2:
-    with open("assets/data_bersih.csv", "rb") as f:
-        st.download_button(
-            "📥 Download Data Bersih (CSV)",
-            f,
-            file_name="data_bersih.csv",
-            mime="text/csv"
-        )
+    tombol_unduh("📥 Download Data Bersih", df_clean, "data_bersih", (fp, "data_bersih"))
 
 # ========================
 # Kamus/Dictionary Segment RFM
@@ -143,148 +142,84 @@ segment_dict_df = pd.DataFrame(segment_info)
 st.dataframe(segment_dict_df, use_container_width=True)
 
 # Download kamus segmen
-segment_dict_df.to_csv("assets/rfm_segment_dictionary.csv", index=False)
-with open("assets/rfm_segment_dictionary.csv", "rb") as f:
-    st.download_button(
-        "📥 Download Kamus Segment RFM",
-        f,
-        file_name="rfm_segment_dictionary.csv",
-        mime="text/csv"
-    )
-
+tombol_unduh("📥 Download Kamus Segment RFM", segment_dict_df, "rfm_segment_dictionary", ("kamus_segmen",))
 
 st.markdown("---")
 st.subheader("📈 Analisis RFM Lebih Lanjut")
 
-# Rename 
-df_rfm_analisis = df_rfm.copy()
-df_rfm_analisis.rename(columns={
-    'Recency': 'day_since_last_order',
-    'Frequency': 'order_cnt',
-    'Total_Transaksi': 'total_order_value'
-}, inplace=True)
-
-
-# Binning Segmentasi RFM sederhana
-def assign_segment(row):
-    if row['day_since_last_order'] <= 30 and row['order_cnt'] >= 4:
-        return "Champion"
-    elif row['order_cnt'] >= 3:
-        return "Loyal Customers"
-    elif row['order_cnt'] >= 2 and row['day_since_last_order'] <= 60:
-        return "Potential Loyalists"
-    elif row['order_cnt'] >= 2 and row['day_since_last_order'] > 90:
-        return "Can't Lose Them"
-    elif row['order_cnt'] == 1 and row['day_since_last_order'] > 90:
-        return "At Risk"
-    elif row['day_since_last_order'] > 60 and row['order_cnt'] == 1:
-        return "About to Sleep"
-    elif row['day_since_last_order'] <= 30 and row['order_cnt'] == 1:
-        return "New Customers"
-    elif row['day_since_last_order'] <= 90 and row['order_cnt'] == 1:
-        return "Promising"
-    elif row['order_cnt'] <= 2:
-        return "Need Attention"
-    else:
-        return "Others"
-
-df_rfm_analisis['Segment'] = df_rfm_analisis.apply(assign_segment, axis=1)
+with profil.tahap("Segmentasi sederhana + statistik") as info:
+    # Rename + Binning Segmentasi RFM sederhana (rule ada di Model.SEGMENT_RULES_SEDERHANA)
+    df_rfm_analisis = memo.rfm_analisis(fp, df_rfm)
 
-# Simpan untuk kebutuhan lainnya
-st.session_state['df_rfm_segment'] = df_rfm_analisis
+    # Simpan untuk kebutuhan lainnya
+    st.session_state['df_rfm_segment'] = df_rfm_analisis
 
-# Hitung metrik deskriptif per segmen
-segment_stats = df_rfm_analisis.groupby('Segment').agg(
-    Customer_Count=('Customer_id', 'nunique'),
-    Mean_Days=('day_since_last_order', 'mean'),
-    Median_Days=('day_since_last_order', 'median'),
-    Mean_Orders=('order_cnt', 'mean'),
-    Median_Orders=('order_cnt', 'median'),
-    Mean_Value=('total_order_value', 'mean'),
-    Median_Value=('total_order_value', 'median')
-).sort_values(by='Customer_Count', ascending=False).reset_index()
+    # Hitung metrik deskriptif per segmen (satu groupby, dipakai juga untuk leaderboard di Insights)
+    ringkasan_sederhana = memo.ringkasan_segmen(fp, df_rfm_analisis, 'Segment')
+    segment_stats = statistik_segmen(ringkasan_sederhana)
 
-# Tampilkan tabel
-st.dataframe(segment_stats, use_container_width=True)
-
-# Optional: Simpan CSV
-segment_stats.to_csv("assets/segment_analysis.csv", index=False)
-with open("assets/segment_analysis.csv", "rb") as f:
-    st.download_button("📥 Download Tabel Segmentasi RFM", f, file_name="segment_analysis.csv", mime="text/csv")
+    # Tampilkan tabel
+    st.dataframe(segment_stats, use_container_width=True)
 
+    # Download tabel
+    tombol_unduh("📥 Download Tabel Segmentasi RFM", segment_stats, "segment_analysis", (fp, "segment_analysis"))
+    info["baris_keluar"] = len(df_rfm_analisis)
 
 
 st.markdown("---")
 st.subheader("📊 RFM Segment Analysis")
 
-# Buat salinan dari df_rfm
-df_rfm_analisis = df_rfm.copy()
-df_rfm_analisis.rename(columns={
-    'Recency': 'day_since_last_order',
-    'Frequency': 'order_cnt',
-    'Total_Transaksi': 'total_order_value'
-}, inplace=True)
-
-# Tambahkan 'pct_unique' 
-if 'pct_unique' not in df_rfm_analisis.columns:
-    np.random.seed(42)
-    df_rfm_analisis['pct_unique'] = np.random.uniform(1, 30, size=len(df_rfm_analisis)).round(1)
-
-# RFM Segmentation Rule (Versi gambar)
-def segment_customer(row):
-    r, f = row['day_since_last_order'], row['order_cnt']
-    if r <= 30 and f >= 10:
-        return "01-Champion"
-    elif f >= 7:
-        return "02-Loyal Customers"
-    elif r <= 60 and f >= 3:
-        return "03-Potential Loyalists"
-    elif r > 90 and f >= 8:
-        return "04-Can't Lose Them"
-    elif r > 60 and f <= 3:
-        return "05-Need Attention"
-    elif r <= 30 and f == 1:
-        return "06-New Customers"
-    elif r <= 90 and f == 1:
-        return "07-Promising"
-    elif r > 90 and f <= 4:
-        return "08-At Risk"
-    elif r > 60 and f <= 2:
-        return "09-About to Sleep"
-    else:
-        return "10-Hibernating"
-
-df_rfm_analisis['segment'] = df_rfm_analisis.apply(segment_customer, axis=1)
-
-# Hitung statistik
-segment_table = df_rfm_analisis.groupby('segment').agg({
-    'Customer_id': 'nunique',
-    'day_since_last_order': ['mean', 'median'],
-    'order_cnt': ['mean', 'median'],
-    'total_order_value': ['mean', 'median'],
-    'pct_unique': ['mean', 'median']
-}).reset_index()
-
-# Rename kolom
-segment_table.columns = ['segment', 'nunique',
-                         'day_since_last_order_mean', 'day_since_last_order_median',
-                         'order_cnt_mean', 'order_cnt_median',
-                         'total_order_value_mean', 'total_order_value_median',
-                         'pct_unique_mean', 'pct_unique_median']
-
-# Tampilkan Tabel
-st.dataframe(segment_table.style.format({
-    'day_since_last_order_mean': '{:.2f}', 'day_since_last_order_median': '{:.0f}',
-    'order_cnt_mean': '{:.2f}', 'order_cnt_median': '{:.0f}',
-    'total_order_value_mean': 'Rp {:,.0f}', 'total_order_value_median': 'Rp {:,.0f}',
-    'pct_unique_mean': '{:.1f}', 'pct_unique_median': '{:.1f}',
-}), use_container_width=True)
-
-# Download CSV
-segment_table.to_csv("assets/rfm_segment_summary.csv", index=False)
-with open("assets/rfm_segment_summary.csv", "rb") as f:
-    st.download_button("📥 Download RFM Segment Table", f, file_name="rfm_segment_summary.csv", mime="text/csv")
+with profil.tahap("Segmentasi 10 segmen + tabel") as info:
+    # Rename + pct_unique + RFM Segmentation Rule (Versi gambar, rule ada di Model.SEGMENT_RULES)
+    df_rfm_analisis = memo.rfm_segmen_gambar(fp, df_rfm)
+
+    # Hitung statistik (satu groupby untuk semua kolom)
+    ringkasan_gambar = memo.ringkasan_segmen(
+        fp, df_rfm_analisis, 'segment', KOLOM_RINGKASAN + ('pct_unique',)
+    )
+    segment_table = tabel_segmen_gambar(ringkasan_gambar)
+
+    # Tampilkan Tabel
+    st.dataframe(segment_table.style.format({
+        'day_since_last_order_mean': '{:.2f}', 'day_since_last_order_median': '{:.0f}',
+        'order_cnt_mean': '{:.2f}', 'order_cnt_median': '{:.0f}',
+        'total_order_value_mean': 'Rp {:,.0f}', 'total_order_value_median': 'Rp {:,.0f}',
+        'pct_unique_mean': '{:.1f}', 'pct_unique_median': '{:.1f}',
+    }), use_container_width=True)
+
+    # Download tabel
+    tombol_unduh("📥 Download RFM Segment Table", segment_table, "rfm_segment_summary", (fp, "rfm_segment_summary"))
+    info["baris_keluar"] = len(df_rfm_analisis)
 
+# ========================
+# 🎯 Skor RFM kuantil (1-5)
+# ========================
+st.markdown("---")
+st.subheader("🎯 Skor RFM Kuantil (R/F/M 1–5)")
+
+with profil.tahap("Skor RFM kuantil + tabel") as info:
+    # Batas kuantil dari sketsa (Model.SketsaKuantil), segmen dari tabel lookup skor
+    batas_skor = memo.batas_skor_rfm(fp, df_rfm)
+    df_skor = memo.skor_rfm(fp, df_rfm)
+    st.caption(
+        "Skor 1–5 per kolom berdasarkan kuintil data ini (Recency dibalik: makin baru makin tinggi). "
+        "Segment ditentukan dari skor R dan rata-rata skor F & M."
+    )
+    st.dataframe(tabel_batas_skor(batas_skor).style.format({
+        'Q20': '{:,.1f}', 'Q40': '{:,.1f}', 'Q60': '{:,.1f}', 'Q80': '{:,.1f}'
+    }), use_container_width=True, hide_index=True)
+
+    ringkasan_skor = memo.ringkasan_segmen(fp, df_skor, 'Segment_Skor', tuple(KOLOM_SKOR) + tuple(KOLOM_SKOR.values()))
+    st.dataframe(ringkasan_skor[
+        ['Segment_Skor', 'nunique', 'Recency_median', 'Frequency_median', 'Total_Transaksi_median',
+         'R_Score_mean', 'F_Score_mean', 'M_Score_mean']
+    ].rename(columns={'nunique': 'Customer_Count'}).style.format({
+        'Recency_median': '{:.0f}', 'Frequency_median': '{:.0f}', 'Total_Transaksi_median': 'Rp {:,.0f}',
+        'R_Score_mean': '{:.2f}', 'F_Score_mean': '{:.2f}', 'M_Score_mean': '{:.2f}',
+    }), use_container_width=True, hide_index=True)
+
+    tombol_unduh("📥 Download Skor RFM per Pelanggan", df_skor, "rfm_score", (fp, "rfm_score"))
+    info["baris_keluar"] = len(df_skor)
 
 # ========================
 # 📊 Distribusi Segmen Pelanggan
@@ -292,63 +227,41 @@ with open("assets/rfm_segment_summary.csv", "rb") as f:
 st.markdown("---")
 st.subheader("📊 Distribusi Segmen Pelanggan")
 
-# Hitung distribusi (jumlah & persentase)
-distrib_df = (
-    df_rfm_analisis['segment']
-    .value_counts()
-    .rename_axis('Segment')
-    .reset_index(name='Customer_Count')
-    .sort_values('Customer_Count', ascending=False)
-    .reset_index(drop=True)
-)
-
-total_cust = distrib_df['Customer_Count'].sum()
-distrib_df['Percent'] = (distrib_df['Customer_Count'] / total_cust * 100).round(2)
-distrib_df['Percent_Label'] = distrib_df['Percent'].astype(str) + '%'
-
-# Tambahkan total sebagai baris terakhir
-total_row = pd.DataFrame({
-    "Segment": ["TOTAL"],
-    "Customer_Count": [total_cust],
-    "Percent": [100.0],
-    "Percent_Label": ["100%"]
-})
-distrib_df_total = pd.concat([distrib_df, total_row], ignore_index=True)
-
-# Tabel distribusi
-st.dataframe(
-    distrib_df_total.style.format({
-        'Customer_Count': '{:,}',
-        'Percent': '{:.2f}'
-    }),
-    use_container_width=True
-)
-
-# Bar chart distribusi (tanpa bar "TOTAL")
-fig_bar = px.bar(
-    distrib_df,
-    x='Segment',
-    y='Customer_Count',
-    text='Percent_Label',
-    title='Distribusi Pelanggan per Segment',
-)
-fig_bar.update_traces(textposition='outside')
-fig_bar.update_layout(
-    xaxis_title='Segment',
-    yaxis_title='Jumlah Pelanggan',
-    xaxis_tickangle=-30,
-    margin=dict(t=60, l=30, r=30, b=30)
-)
-st.plotly_chart(fig_bar, use_container_width=True)
-
-# Download CSV distribusi (termasuk total)
-distrib_df_total.to_csv("assets/rfm_segment_distribution.csv", index=False)
-with open("assets/rfm_segment_distribution.csv", "rb") as f:
-    st.download_button(
-        "📥 Download Distribusi Segmen (CSV)",
-        f,
-        file_name="rfm_segment_distribution.csv",
-        mime="text/csv"
+with profil.tahap("Distribusi segmen + bar chart (Plotly)"):
+    import plotly.express as px  # di-import saat bagian chart dirender, bukan saat halaman dibuka
+    # Hitung distribusi (jumlah & persentase), plus baris total
+    distrib_df, distrib_df_total = memo.distribusi_segmen(fp, df_rfm_analisis)
+
+    # Tabel distribusi
+    st.dataframe(
+        distrib_df_total.style.format({
+            'Customer_Count': '{:,}',
+            'Percent': '{:.2f}'
+        }),
+        use_container_width=True
+    )
+
+    # Bar chart distribusi (tanpa bar "TOTAL")
+    fig_bar = px.bar(
+        distrib_df,
+        x='Segment',
+        y='Customer_Count',
+        text='Percent_Label',
+        title='Distribusi Pelanggan per Segment',
+    )
+    fig_bar.update_traces(textposition='outside')
+    fig_bar.update_layout(
+        xaxis_title='Segment',
+        yaxis_title='Jumlah Pelanggan',
+        xaxis_tickangle=-30,
+        margin=dict(t=60, l=30, r=30, b=30)
+    )
+    st.plotly_chart(fig_bar, use_container_width=True)
+
+    # Download distribusi (termasuk total)
+    tombol_unduh(
+        "📥 Download Distribusi Segmen", distrib_df_total, "rfm_segment_distribution",
+        (fp, "rfm_segment_distribution")
     )
 
 
@@ -359,33 +272,24 @@ with open("assets/rfm_segment_distribution.csv", "rb") as f:
 st.markdown("---")
 st.subheader("🗺️ Visualisasi Segmentasi Pelanggan (Treemap)")
 
-# Hitung jumlah per segment
-segment_size = df_rfm_analisis['segment'].value_counts().reset_index()
-segment_size.columns = ['segment', 'customer_count']
+with profil.tahap("Treemap (Plotly)"):
+    # Hitung jumlah, persentase & label per segment
+    segment_size = memo.ukuran_segmen_treemap(fp, df_rfm_analisis)
 
-# Hitung total & persentase
-total_customer = segment_size['customer_count'].sum()
-segment_size['percent'] = (segment_size['customer_count'] / total_customer * 100).round(1)
-segment_size['label_full'] = segment_size.apply(
-    lambda row: f"{row['segment']} ({row['customer_count']} | {row['percent']}%)", axis=1
-)
+    # warna unik per segmen
+    color_palette = px.colors.qualitative.Set3  # Atau gunakan Set1, Pastel, Dark, dll
 
-# label segmen unik sebagai kategori warna 
-segment_size['color'] = segment_size['segment']
-
-# warna unik per segmen
-color_palette = px.colors.qualitative.Set3  # Atau gunakan Set1, Pastel, Dark, dll
-
-fig = px.treemap(
-    segment_size,
-    path=['label_full'],
-    values='customer_count',
-    color='color',
-    color_discrete_sequence=color_palette,
-    title="Proporsi Pelanggan per Segment"
-)
+    fig = px.treemap(
+        segment_size,
+        path=['label_full'],
+        values='customer_count',
+        color='color',
+        color_discrete_sequence=color_palette,
+        title="Proporsi Pelanggan per Segment"
+    )
 
-fig.update_traces(textinfo="label+value+percent entry")
-fig.update_layout(margin=dict(t=50, l=25, r=25, b=25))
-st.plotly_chart(fig, use_container_width=True)
+    fig.update_traces(textinfo="label+value+percent entry")
+    fig.update_layout(margin=dict(t=50, l=25, r=25, b=25))
+    st.plotly_chart(fig, use_container_width=True)
 
+profil.panel("rfm_analysis")
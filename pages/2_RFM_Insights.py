@@ -1,17 +1,21 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
+import aset
+import clv
+import memo
+import profil
+from export import pilih_format, tombol_unduh
+from Model import leaderboard_segmen
 
-st.set_page_config(
-    page_title="RFM Insights",
-    page_icon="assets/favicon.png",
-    layout="wide"
-)
+aset.konfigurasi_halaman("RFM Insights")
 
 with st.sidebar:
-    st.image("assets/favicon.png", width=150)
+    st.image(aset.favicon(), width=150)
     st.markdown("Qaraa Segmentation App")
+    if "data_bersih" in st.session_state:
+        st.caption(f"💾 Memori session: {sum(memo.jejak_memori_session().values()):.1f} MB")
+    pilih_format()
+    profil.mulai_halaman("rfm_insights")
 
 st.title("📊 RFM Insights")
 
@@ -26,30 +30,30 @@ if "df_rfm_segment" not in st.session_state:
     st.warning("⚠️ Belum ada segmentasi RFM. Silakan buka menu RFM Analysis terlebih dahulu.")
     st.stop()
 
-df_clean: pd.DataFrame = st.session_state["data_bersih"].copy()
-df_rfm_seg: pd.DataFrame = st.session_state["df_rfm_segment"].copy()
+df_clean: pd.DataFrame = st.session_state["data_bersih"]
+df_rfm_seg: pd.DataFrame = st.session_state["df_rfm_segment"]
 
-# Pastikan kolom nama tersedia
-if "Customer_name" not in df_clean.columns:
-    df_clean["Customer_name"] = np.nan
+with profil.tahap("Gabung nama (fingerprint + merge)") as info:
+    # Fingerprint dataset: tabel turunan di bawah di-memo per dataset,
+    # jadi ganti segment / ketik di search tidak menghitung ulang semuanya
+    fp = memo.fingerprint_session()
 
-# Satukan nama ke seluruh df_rfm_seg agar konsisten dipakai di semua komponen
-df_names = df_clean[["Customer_id", "Customer_name"]].drop_duplicates()
-df_rfm_seg = df_rfm_seg.merge(df_names, on="Customer_id", how="left")
+    # Satukan nama ke seluruh df_rfm_seg agar konsisten dipakai di semua komponen
+    df_rfm_seg = memo.gabung_nama(fp, df_rfm_seg, df_clean)
+    info["baris_keluar"] = len(df_rfm_seg)
 
 # =====================
 # Ringkasan Umum RFM
 # =====================
 st.subheader("📌 Ringkasan RFM")
 
-total_pelanggan = df_rfm_seg["Customer_id"].nunique()
-avg_freq = df_rfm_seg["order_cnt"].mean()
-avg_monetary = df_rfm_seg["total_order_value"].mean()
+with profil.tahap("Ringkasan RFM"):
+    total_pelanggan, avg_freq, avg_monetary = memo.ringkasan_rfm(fp, df_rfm_seg)
 
-col1, col2, col3 = st.columns(3)
-col1.metric("Total Pelanggan", f"{total_pelanggan:,}")
-col2.metric("Rata-rata Frequency", f"{avg_freq:.2f}")
-col3.metric("Rata-rata Monetary", f"Rp {avg_monetary:,.0f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Pelanggan", f"{total_pelanggan:,}")
+    col2.metric("Rata-rata Frequency", f"{avg_freq:.2f}")
+    col3.metric("Rata-rata Monetary", f"Rp {avg_monetary:,.0f}")
 
 # =====================
 # Distribusi RFM
@@ -57,25 +61,38 @@ col3.metric("Rata-rata Monetary", f"Rp {avg_monetary:,.0f}")
 st.markdown("---")
 st.subheader("📈 Distribusi Recency / Frequency / Monetary")
 
-c1, c2, c3 = st.columns(3)
-
-with c1:
-    fig_r = px.histogram(
-        df_rfm_seg, x="day_since_last_order", nbins=30, title="Distribusi Recency (hari)"
+# Histogram di-bin di server & di-cache per dataset: payload chart tetap ~30 bar,
+# berapa pun jumlah pelanggannya
+def chart_histogram(df_bin, title, x_title, x="Bin_Tengah"):
+    fig = px.bar(
+        df_bin, x=x, y="Jumlah", title=title,
+        hover_data={"Label": True, "Bin_Tengah": False}
     )
-    st.plotly_chart(fig_r, use_container_width=True)
+    fig.update_traces(marker_line_width=0)
+    fig.update_layout(bargap=0, xaxis_title=x_title, yaxis_title="count")
+    return fig
 
-with c2:
-    fig_f = px.histogram(
-        df_rfm_seg, x="order_cnt", nbins=30, title="Distribusi Frequency (jumlah pesanan)"
-    )
-    st.plotly_chart(fig_f, use_container_width=True)
 
-with c3:
-    fig_m = px.histogram(
-        df_rfm_seg, x="total_order_value", nbins=30, title="Distribusi Monetary (Rp)"
-    )
-    st.plotly_chart(fig_m, use_container_width=True)
+with profil.tahap("Histogram R/F/M (Plotly)"):
+    import plotly.express as px  # di-import saat bagian chart dirender, bukan saat halaman dibuka
+
+    c1, c2, c3 = st.columns(3)
+
+    with c1:
+        df_bin_r = memo.histogram_rfm(fp, df_rfm_seg, "day_since_last_order", 30)
+        fig_r = chart_histogram(df_bin_r, "Distribusi Recency (hari)", "day_since_last_order")
+        st.plotly_chart(fig_r, use_container_width=True)
+
+    with c2:
+        df_bin_f = memo.histogram_rfm(fp, df_rfm_seg, "order_cnt", 30)
+        fig_f = chart_histogram(df_bin_f, "Distribusi Frequency (jumlah pesanan)", "order_cnt")
+        st.plotly_chart(fig_f, use_container_width=True)
+
+    with c3:
+        # Monetary sangat miring ke kanan -> bin logaritmik, sumbu berupa label rentang Rp
+        df_bin_m = memo.histogram_rfm(fp, df_rfm_seg, "total_order_value", 30, log=True)
+        fig_m = chart_histogram(df_bin_m, "Distribusi Monetary (Rp)", "total_order_value (Rp, skala log)", x="Label")
+        st.plotly_chart(fig_m, use_container_width=True)
 
 # =====================
 # Segment Leaderboard
@@ -83,27 +100,19 @@ with c3:
 st.markdown("---")
 st.subheader("🏆 Segment Leaderboard")
 
-seg_leader = (
-    df_rfm_seg
-    .groupby("Segment")
-    .agg(
-        Customer_Count=("Customer_id", "nunique"),
-        Avg_Freq=("order_cnt", "mean"),
-        Avg_Monetary=("total_order_value", "mean"),
-        Total_Monetary=("total_order_value", "sum"),
+with profil.tahap("Segment leaderboard"):
+    # Ringkasan per segmen sama dengan di RFM Analysis (key memo sama -> tidak dihitung ulang)
+    ringkasan_segmen = memo.ringkasan_segmen(fp, st.session_state["df_rfm_segment"], "Segment")
+    seg_leader = leaderboard_segmen(ringkasan_segmen)
+
+    st.dataframe(
+        seg_leader.style.format({
+            "Avg_Freq": "{:.2f}",
+            "Avg_Monetary": "Rp {:,.0f}",
+            "Total_Monetary": "Rp {:,.0f}",
+        }),
+        use_container_width=True
     )
-    .sort_values("Total_Monetary", ascending=False)
-    .reset_index()
-)
-
-st.dataframe(
-    seg_leader.style.format({
-        "Avg_Freq": "{:.2f}",
-        "Avg_Monetary": "Rp {:,.0f}",
-        "Total_Monetary": "Rp {:,.0f}",
-    }),
-    use_container_width=True
-)
 
 # =====================
 # Top Customers (High Monetary)
@@ -111,21 +120,91 @@ st.dataframe(
 st.markdown("---")
 st.subheader("💰 Top Customers (berdasarkan Monetary)")
 
-df_top = (
-    df_rfm_seg
-    .sort_values("total_order_value", ascending=False)
-    .loc[:, ["Customer_id", "Customer_name", "Segment", "order_cnt", "total_order_value", "day_since_last_order"]]
-    .head(20)
-    .rename(columns={
-        "order_cnt": "Frequency",
-        "total_order_value": "Total_Transaksi",
-        "day_since_last_order": "Recency(Hari)"
-    })
+t1, t2 = st.columns([1, 3])
+top_n = t1.number_input("Jumlah Top-N", min_value=5, max_value=500, value=20, step=5)
+top_per_segmen = t2.checkbox("Top-N per segment", value=False)
+
+with profil.tahap("Top customers") as info:
+    df_top = memo.top_customers(fp, df_rfm_seg, int(top_n), top_per_segmen)
+
+    st.dataframe(
+        df_top.style.format({"Total_Transaksi": "Rp {:,.0f}"}),
+        use_container_width=True
+    )
+    info["baris_keluar"] = len(df_top)
+
+# =====================
+# Prediksi Churn & CLV (BG/NBD + Gamma-Gamma)
+# =====================
+st.markdown("---")
+st.subheader("🔮 Prediksi Churn & Customer Lifetime Value")
+st.caption(
+    "BG/NBD memperkirakan peluang customer masih aktif & jumlah pembelian berikutnya, "
+    "Gamma-Gamma memperkirakan nilai per pembelian. Satu pembelian = satu hari order."
 )
 
+h1, h2 = st.columns([1, 3])
+horizon = h1.number_input("Horizon prediksi (minggu)", min_value=4, max_value=104, value=12, step=4)
+batas_churn = h2.slider("Batas peluang churn", min_value=0.1, max_value=0.9, value=0.5, step=0.05)
+
+with profil.tahap("Fit + skor CLV") as info:
+    df_pembelian = memo.ringkasan_pembelian(fp, df_clean)
+    # Parameter model di-fit sekali per dataset (cache Parquet kalau data dari Home)
+    if "data_key" in st.session_state:
+        df_param = memo.fit_clv_cached(fp, df_pembelian, st.session_state["data_key"])
+    else:
+        df_param = memo.fit_clv(fp, df_pembelian)
+    df_clv = memo.skor_clv(fp, df_rfm_seg, df_pembelian, df_param, int(horizon))
+    info["baris_keluar"] = len(df_clv)
+
+# Parameter di luar rentang valid -> prediksi NaN, tampilkan peringatan, bukan angka ngawur
+for pesan in clv.cek_parameter(df_param):
+    st.warning(f"⚠️ {pesan}")
+
+
+def format_metrik(nilai, fmt):
+    return "—" if pd.isna(nilai) else fmt.format(nilai)
+
+
+sekali = df_clv["Dasar_P_Alive"] == clv.DASAR_RECENCY
+c1, c2, c3 = st.columns(3)
+c1.metric("Rata-rata P(aktif)", format_metrik(df_clv["P_Alive"].mean(), "{:.1%}"))
+c2.metric(f"Prediksi Transaksi {int(horizon)} minggu",
+          format_metrik(df_clv["Prediksi_Transaksi"].sum(min_count=1), "{:,.0f}"))
+c3.metric(f"Total CLV {int(horizon)} minggu", format_metrik(df_clv["CLV"].sum(min_count=1), "Rp {:,.0f}"))
+c1.caption(
+    f"BG/NBD tidak bisa menilai churn customer yang baru 1x beli ({sekali.mean():.0%} customer): "
+    "menurut model mereka selalu aktif. P(aktif) mereka diganti estimasi recency, yaitu porsi "
+    "customer repeat yang jeda antar pembeliannya lebih panjang dari umur customer tersebut "
+    "(kolom Dasar_P_Alive)."
+)
+
+with st.expander("⚙️ Parameter model"):
+    st.dataframe(df_param, use_container_width=True, hide_index=True)
+
+st.markdown("**CLV per Segment**")
+st.dataframe(
+    memo.ringkasan_clv((fp, int(horizon)), df_clv).style.format({
+        "Avg_P_Alive": "{:.1%}",
+        "Avg_Prediksi_Transaksi": "{:.2f}",
+        "Avg_CLV": "Rp {:,.0f}",
+        "Total_CLV": "Rp {:,.0f}",
+    }, na_rep="tidak terestimasi"),
+    use_container_width=True, hide_index=True
+)
+
+st.markdown("**Customer bernilai tinggi yang berisiko churn**")
+df_churn = memo.berisiko_churn((fp, int(horizon)), df_clv, int(top_n), batas_churn, "total_order_value")
+kolom_churn = ["Customer_id", "Customer_name", "Segment", "total_order_value", "Prob_Churn",
+               "Dasar_P_Alive", "Prediksi_Transaksi", "CLV"]
 st.dataframe(
-    df_top.style.format({"Total_Transaksi": "Rp {:,.0f}"}),
-    use_container_width=True
+    df_churn[kolom_churn].style.format({
+        "total_order_value": "Rp {:,.0f}",
+        "Prob_Churn": "{:.1%}",
+        "Prediksi_Transaksi": "{:.2f}",
+        "CLV": "Rp {:,.0f}",
+    }, na_rep="tidak terestimasi"),
+    use_container_width=True, hide_index=True
 )
 
 # ======================
@@ -148,33 +227,23 @@ reco_map = {
 }
 
 # Pilihan segment
-seg_list = sorted(df_rfm_seg["Segment"].dropna().unique().tolist())
+seg_list = memo.daftar_segmen(fp, df_rfm_seg)
 picked = st.selectbox("Pilih Segment", options=seg_list)
 st.info(f"🎯 Rekomendasi untuk **{picked}**: {reco_map.get(picked, '—')}")
 
-# Pencarian nama/ID
+# Pencarian nama/ID (index dibangun sekali per dataset)
 search_q = st.text_input("🔎 Cari Customer (Nama/ID)", value="").strip().lower()
+semua_segmen = st.checkbox("Cari di semua segment", value=False)
 
-df_segview = df_rfm_seg[df_rfm_seg["Segment"] == picked].copy()
-if search_q:
-    df_segview = df_segview[
-        df_segview["Customer_id"].astype(str).str.lower().str.contains(search_q)
-        | df_segview["Customer_name"].astype(str).str.lower().str.contains(search_q)
-    ]
+with profil.tahap("Index + filter segment") as info:
+    index_cari = memo.index_pencarian(fp, df_rfm_seg)
+    df_segview_out = memo.filter_segmen(fp, df_rfm_seg, picked, search_q, index_cari, semua_segmen)
 
-df_segview_out = (
-    df_segview.loc[:, ["Customer_id", "Customer_name", "order_cnt", "total_order_value", "day_since_last_order"]]
-    .rename(columns={
-        "order_cnt": "Frequency",
-        "total_order_value": "Total_Transaksi",
-        "day_since_last_order": "Recency(Hari)"
-    })
-)
-
-st.dataframe(
-    df_segview_out.style.format({"Total_Transaksi": "Rp {:,.0f}"}),
-    use_container_width=True
-)
+    st.dataframe(
+        df_segview_out.style.format({"Total_Transaksi": "Rp {:,.0f}"}),
+        use_container_width=True
+    )
+    info["baris_keluar"] = len(df_segview_out)
 
 # =====================
 # Unduhan
@@ -190,16 +259,26 @@ df_rfm_seg_out = (
         "day_since_last_order": "Recency"
     })[["Customer_id", "Customer_name", "Recency", "Frequency", "Total_Transaksi", "Avg_Transaction", "Segment"]]
 )
-df_rfm_seg_out.to_csv("assets/rfm_segmented.csv", index=False)
-with open("assets/rfm_segmented.csv", "rb") as f:
-    st.download_button("📥 Download RFM Segmented", f, file_name="rfm_segmented.csv", mime="text/csv")
+tombol_unduh("📥 Download RFM Segmented", df_rfm_seg_out, "rfm_segmented", (fp, "rfm_segmented"))
 
-# Top 20 customers (dengan nama)
-df_top.to_csv("assets/top20_customers.csv", index=False)
-with open("assets/top20_customers.csv", "rb") as f:
-    st.download_button("📥 Download Top 20 Customers", f, file_name="top20_customers.csv", mime="text/csv")
+# Top-N customers (dengan nama)
+tombol_unduh(
+    f"📥 Download Top {top_n} Customers", df_top, f"top{top_n}_customers",
+    (fp, "top_customers", top_n, top_per_segmen)
+)
+
+# Prediksi churn & CLV per customer
+tombol_unduh(
+    "📥 Download Prediksi Churn & CLV",
+    df_clv[["Customer_id", "Customer_name", "Segment"] + clv.KOLOM_CLV],
+    f"clv_{int(horizon)}minggu", (fp, "clv", int(horizon))
+)
 
 # Segment terpilih (dengan nama + filter)
-df_segview_out.to_csv("assets/segment_selected.csv", index=False)
-with open("assets/segment_selected.csv", "rb") as f:
-    st.download_button(f"📥 Download Data Segment '{picked}' (Filtered)", f, file_name=f"segment_{picked.replace(' ','_').lower()}.csv", mime="text/csv")
+tombol_unduh(
+    f"📥 Download Data Segment '{picked}' (Filtered)", df_segview_out,
+    f"segment_{picked.replace(' ','_').lower()}",
+    (fp, "segment", picked, search_q, semua_segmen)
+)
+
+profil.panel("rfm_insights")
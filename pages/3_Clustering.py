@@ -0,0 +1,187 @@
+import streamlit as st
+import pandas as pd
+import aset
+import memo
+from export import pilih_format, tombol_unduh
+
+aset.konfigurasi_halaman("Clustering Pelanggan")
+
+with st.sidebar:
+    st.image(aset.favicon(), width=150)
+    st.markdown("Qaraa Segmentation App")
+    if "data_bersih" in st.session_state:
+        st.caption(f"💾 Memori session: {sum(memo.jejak_memori_session().values()):.1f} MB")
+    pilih_format()
+
+st.title("🧩 Clustering Pelanggan (K-Means)")
+
+# Validasi data
+if "data_bersih" not in st.session_state:
+    st.warning("⚠️ Silakan upload data terlebih dahulu di halaman Home.")
+    st.stop()
+
+df_clean = st.session_state["data_bersih"]
+fp = memo.fingerprint_session()
+
+# Hitung RFM (pakai cache Parquet kalau dataset sudah dikenal)
+if "data_key" in st.session_state:
+    df_rfm = memo.hitung_rfm_cached(fp, df_clean, st.session_state["data_key"])
+else:
+    df_rfm = memo.hitung_rfm(fp, df_clean)
+
+# =====================
+# Pengaturan
+# =====================
+c1, c2, c3 = st.columns(3)
+n_clusters = c1.slider("Jumlah Cluster (k)", min_value=2, max_value=8, value=4)
+mode = c2.selectbox(
+    "Algoritma",
+    options=["auto", "kmeans", "minibatch"],
+    help="auto = MiniBatchKMeans kalau pelanggan sangat banyak, selain itu KMeans biasa"
+)
+warm_start = c3.checkbox(
+    "Warm start dari centroid sebelumnya",
+    help="Pakai centroid hasil terakhir (k yang sama) sebagai titik awal, lebih cepat dari 10x restart"
+)
+
+# =====================
+# Pemilihan k (Elbow / Silhouette / DBI)
+# =====================
+K_SWEEP = tuple(range(1, 10))
+
+with st.expander("🔍 Pemilihan Jumlah Cluster (Elbow / Silhouette / DBI)"):
+    st.caption(
+        "Semua k di-fit paralel. Silhouette dihitung di sampel terstratifikasi "
+        "(± = interval kepercayaan 95%), model hasil sweep dipakai ulang untuk k terpilih."
+    )
+    if st.button("▶️ Jalankan evaluasi k=1..9"):
+        st.session_state["sweep_aktif"] = (fp, mode)
+
+    if st.session_state.get("sweep_aktif") == (fp, mode):
+        df_sweep, model_sweep = memo.sweep_k(fp, df_rfm, K_SWEEP, mode)
+        st.dataframe(df_sweep.style.format({
+            "WCSS": "{:,.2f}", "DBI": "{:.3f}",
+            "Silhouette": "{:.3f}", "Silhouette_CI95": "± {:.3f}"
+        }), use_container_width=True, hide_index=True)
+
+        import plotly.express as px  # hanya di-import kalau evaluasi k dijalankan
+
+        fig_elbow = px.line(df_sweep, x="k", y="WCSS", markers=True, title="Elbow Method for Optimal k")
+        st.plotly_chart(fig_elbow, use_container_width=True)
+    else:
+        model_sweep = {}
+
+# Centroid terakhir per (dataset, k) untuk warm start
+centroid_lama = st.session_state.setdefault("centroid_cluster", {})
+init_centroid = centroid_lama.get((fp, n_clusters)) if warm_start else None
+
+# Model dari sweep dipakai langsung kalau ada (tanpa fit ulang)
+model = model_sweep.get(n_clusters) if init_centroid is None else None
+
+df_cluster, centroid, inertia = memo.cluster_rfm(
+    fp, df_rfm, n_clusters, mode, init_centroid=init_centroid, model=model
+)
+centroid_lama[(fp, n_clusters)] = tuple(map(tuple, centroid.to_numpy()))
+
+col1, col2 = st.columns(2)
+col1.metric("Jumlah Pelanggan", f"{len(df_cluster):,}")
+col2.metric("Inertia (WCSS)", f"{inertia:,.2f}")
+
+# =====================
+# Ringkasan per Cluster
+# =====================
+st.markdown("---")
+st.subheader("📋 Ringkasan per Cluster")
+# Key memo = dataset + pengaturan clustering
+key_cluster = (fp, n_clusters, mode, init_centroid, model)
+st.dataframe(memo.ringkasan_cluster(key_cluster, df_cluster), use_container_width=True)
+
+st.markdown("**Centroid (skala asli)**")
+st.dataframe(centroid.style.format("{:,.2f}"), use_container_width=True)
+
+# =====================
+# Visualisasi
+# =====================
+st.markdown("---")
+st.subheader("📈 Visualisasi Cluster")
+
+v1, v2 = st.columns(2)
+with v1:
+    import plotly.express as px  # di-import saat bagian chart dirender, bukan saat halaman dibuka
+
+    # Scatter cukup pakai sampel supaya payload chart tetap kecil
+    df_plot = df_cluster.sample(min(len(df_cluster), 5000), random_state=42)
+    fig_scatter = px.scatter(
+        df_plot,
+        x="Total_Transaksi",
+        y="Avg_Transaction",
+        color=df_plot["Cluster"].astype(str),
+        title="Cluster Pelanggan Berdasarkan Pola Transaksi",
+        labels={"color": "Cluster"}
+    )
+    fig_scatter.add_scatter(
+        x=centroid["Total_Transaksi"],
+        y=centroid["Avg_Transaction"],
+        mode="markers",
+        marker=dict(symbol="x", size=14, color="black"),
+        name="Centroid"
+    )
+    st.plotly_chart(fig_scatter, use_container_width=True)
+
+with v2:
+    cluster_counts = df_cluster["Cluster"].value_counts().sort_index()
+    fig_pie = px.pie(
+        names=[f"Cluster {i}" for i in cluster_counts.index],
+        values=cluster_counts.to_numpy(),
+        title="Komposisi Jumlah Pelanggan per Cluster"
+    )
+    st.plotly_chart(fig_pie, use_container_width=True)
+
+# =====================
+# Rekomendasi Produk
+# =====================
+st.markdown("---")
+st.subheader("🎁 Rekomendasi Produk")
+st.caption(
+    "Varian nama produk (promo, flash sale) disatukan ke katalog: lini x paket x durasi. "
+    "Next best product = co-occurrence antar produk + produk populer di grupnya; produk yang "
+    "sudah dibeli dan durasi yang lebih pendek dari yang dimiliki tidak direkomendasikan."
+)
+
+dasar = st.radio("Kelompokkan per", options=["Cluster", "Segment"], horizontal=True)
+if dasar == "Cluster":
+    grup = df_cluster.set_index("Customer_id")["Cluster"]
+    key_rek = (key_cluster, "cluster")
+else:
+    grup = memo.rfm_analisis(fp, df_rfm).set_index("Customer_id")["Segment"]
+    key_rek = (fp, "segment")
+rek = memo.rekomendasi(key_rek, df_clean, grup)
+
+r1, r2 = st.columns(2)
+with r1:
+    st.markdown(f"**Top produk per {dasar}**")
+    st.dataframe(
+        rek.top_grup.rename(columns={"Grup": dasar}).style.format({"Total_Transaksi": "Rp {:,.0f}"}),
+        use_container_width=True, hide_index=True
+    )
+with r2:
+    fig_cooc = px.imshow(
+        rek.cooccurrence, text_auto=True, color_continuous_scale="Blues", aspect="auto",
+        title="Co-occurrence Produk (jumlah customer)"
+    )
+    st.plotly_chart(fig_cooc, use_container_width=True)
+
+cari_id = st.text_input("🔎 Next best product untuk Customer_id", value="").strip()
+if cari_id:
+    try:
+        hasil_rek = rek.untuk(pd.Index([cari_id]).astype(rek.customer.dtype))
+        st.dataframe(hasil_rek, use_container_width=True, hide_index=True)
+    except (ValueError, TypeError):
+        st.warning("⚠️ Format Customer_id tidak valid.")
+
+# =====================
+# Unduhan
+# =====================
+st.markdown("---")
+tombol_unduh("📥 Download RFM + Cluster", df_cluster, "rfm_clustered", key_cluster)
+tombol_unduh("📥 Download Next Best Product", rek.semua(), "next_best_product", key_rek)
@@ -0,0 +1,100 @@
+import streamlit as st
+import pandas as pd
+import aset
+import memo
+from export import pilih_format, tombol_unduh
+
+aset.konfigurasi_halaman("Migrasi Segmen")
+
+with st.sidebar:
+    st.image(aset.favicon(), width=150)
+    st.markdown("Qaraa Segmentation App")
+    if "data_bersih" in st.session_state:
+        st.caption(f"💾 Memori session: {sum(memo.jejak_memori_session().values()):.1f} MB")
+    pilih_format()
+
+st.title("🔀 Migrasi Segmen Bulanan")
+
+# Validasi data
+if "data_bersih" not in st.session_state:
+    st.warning("⚠️ Silakan upload data terlebih dahulu di halaman Home.")
+    st.stop()
+
+df_clean = st.session_state["data_bersih"]
+fp = memo.fingerprint_session()
+
+# RFM di tiap akhir bulan, dihitung sekaligus dalam satu pass
+df_snap = memo.hitung_rfm_snapshot(fp, df_clean)
+snapshots = list(df_snap["Snapshot"].unique())
+
+ATURAN = {"10 segmen (RFM Analysis)": "gambar", "Sederhana (RFM Insights)": "sederhana"}
+jenis = ATURAN[st.radio("Aturan segmentasi", options=list(ATURAN), horizontal=True)]
+df_snap_seg = memo.segmentasi_snapshot(fp, df_snap, jenis)
+
+
+def label_snapshot(tanggal):
+    return pd.Timestamp(tanggal).strftime("%d %b %Y")
+
+
+st.caption(f"📅 {len(snapshots)} snapshot: {label_snapshot(snapshots[0])} s/d {label_snapshot(snapshots[-1])}")
+
+# =====================
+# Tren ukuran segmen
+# =====================
+st.markdown("---")
+st.subheader("📈 Jumlah Pelanggan per Segment dari Waktu ke Waktu")
+
+import plotly.express as px  # di-import saat bagian chart dirender, bukan saat halaman dibuka
+
+df_tren = memo.ukuran_segmen_snapshot((fp, jenis), df_snap_seg)
+fig_tren = px.area(
+    df_tren.assign(Snapshot=df_tren["Snapshot"].map(label_snapshot)),
+    x="Snapshot", y="Customer_Count", color="Segment",
+    title="Ukuran Segment per Snapshot"
+)
+fig_tren.update_layout(xaxis_title="Snapshot", yaxis_title="Jumlah Pelanggan")
+st.plotly_chart(fig_tren, use_container_width=True)
+
+# =====================
+# Matriks transisi
+# =====================
+st.markdown("---")
+st.subheader("🔀 Matriks Transisi Segment")
+
+if len(snapshots) < 2:
+    st.info("Data hanya mencakup satu snapshot, belum ada transisi yang bisa dihitung.")
+    st.stop()
+
+c1, c2, c3 = st.columns(3)
+dari = c1.selectbox("Dari snapshot", options=snapshots, index=len(snapshots) - 2, format_func=label_snapshot)
+ke = c2.selectbox("Ke snapshot", options=snapshots, index=len(snapshots) - 1, format_func=label_snapshot)
+persen = c3.checkbox("Tampilkan persen per baris", value=False)
+
+if dari >= ke:
+    st.warning("⚠️ Snapshot tujuan harus setelah snapshot asal.")
+    st.stop()
+
+matriks = memo.matriks_transisi((fp, jenis), df_snap_seg, dari, ke, normalisasi=persen)
+
+fig_heat = px.imshow(
+    matriks,
+    text_auto=".1f" if persen else True,
+    color_continuous_scale="Blues",
+    aspect="auto",
+    title=f"Transisi {label_snapshot(dari)} → {label_snapshot(ke)}" + (" (%)" if persen else "")
+)
+fig_heat.update_layout(xaxis_title="Segment tujuan", yaxis_title="Segment asal")
+st.plotly_chart(fig_heat, use_container_width=True)
+
+st.dataframe(matriks, use_container_width=True)
+st.caption("Baris **(Baru)** = pelanggan yang transaksi pertamanya setelah snapshot asal.")
+
+# =====================
+# Unduhan
+# =====================
+st.markdown("---")
+tombol_unduh(
+    "📥 Download Matriks Transisi", matriks.reset_index(), "matriks_transisi",
+    (fp, jenis, dari, ke, persen)
+)
+tombol_unduh("📥 Download RFM per Snapshot", df_snap_seg, "rfm_snapshot", (fp, jenis, "rfm_snapshot"))
@@ -0,0 +1,135 @@
+import streamlit as st
+import pandas as pd
+import aset
+import gudang
+import memo
+import profil
+from export import pilih_format, tombol_unduh
+from Model import leaderboard_segmen
+
+aset.konfigurasi_halaman("Gudang Transaksi")
+
+with st.sidebar:
+    st.image(aset.favicon(), width=150)
+    st.markdown("Qaraa Segmentation App")
+    pilih_format()
+    profil.mulai_halaman("gudang_transaksi")
+
+st.title("🗄️ Gudang Transaksi (Histori Multi-Tahun)")
+st.caption(
+    "Transaksi disimpan per bulan (Parquet) di assets/gudang. RFM di halaman ini hanya membaca "
+    "Customer_id, Order_date, dan Total_Transaksi untuk rentang yang dipilih, tanpa memuat seluruh histori."
+)
+
+# =====================
+# Validasi gudang
+# =====================
+if not gudang.ada_gudang():
+    st.warning("⚠️ Gudang masih kosong. Simpan data dari halaman Home (💾 Simpan ke gudang transaksi) "
+               "atau jalankan `python batch.py <file> --gudang`.")
+    st.stop()
+
+versi = gudang.versi_gudang()
+
+with profil.tahap("Info gudang (kolom Order_date)") as info:
+    df_info = memo.info_gudang(versi)
+    info["baris_keluar"] = len(df_info)
+
+awal = df_info["Order_date_min"].min().date()
+akhir = df_info["Order_date_max"].max().date()
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Total Transaksi", f"{df_info['Baris'].sum():,}")
+c2.metric("Jumlah Bulan", f"{len(df_info)}")
+c3.metric("Rentang", f"{awal:%b %Y} – {akhir:%b %Y}")
+
+with st.expander("📅 Baris per bulan"):
+    st.dataframe(df_info, use_container_width=True, hide_index=True)
+
+# =====================
+# Rentang tanggal
+# =====================
+rentang = st.date_input("Rentang Order_date", value=(awal, akhir), min_value=awal, max_value=akhir)
+if len(rentang) != 2:
+    st.info("Pilih tanggal awal dan akhir.")
+    st.stop()
+
+# Tanggal akhir ikut dihitung: batas atas eksklusif = hari berikutnya
+mulai = pd.Timestamp(rentang[0])
+sampai = pd.Timestamp(rentang[1]) + pd.Timedelta(days=1)
+kunci = (versi, mulai, sampai)
+
+with profil.tahap("RFM gudang (pushdown kolom + tanggal)") as info:
+    df_rfm = memo.hitung_rfm_gudang(versi, mulai, sampai)
+    info["baris_keluar"] = len(df_rfm)
+
+if df_rfm.empty:
+    st.warning("Tidak ada transaksi di rentang ini.")
+    st.stop()
+
+with profil.tahap("Segmentasi + nama"):
+    df_rfm_seg = memo.rfm_analisis(kunci, df_rfm)
+    df_nama = memo.nama_customer_gudang(versi, mulai, sampai)
+    df_rfm_seg = memo.gabung_nama(kunci, df_rfm_seg, df_nama)
+
+# =====================
+# Ringkasan
+# =====================
+st.markdown("---")
+st.subheader("📌 Ringkasan RFM")
+
+total_pelanggan, avg_freq, avg_monetary = memo.ringkasan_rfm(kunci, df_rfm_seg)
+col1, col2, col3 = st.columns(3)
+col1.metric("Total Pelanggan", f"{total_pelanggan:,}")
+col2.metric("Rata-rata Frequency", f"{avg_freq:.2f}")
+col3.metric("Rata-rata Monetary", f"Rp {avg_monetary:,.0f}")
+
+# =====================
+# Segment Leaderboard
+# =====================
+st.markdown("---")
+st.subheader("🏆 Segment Leaderboard")
+
+with profil.tahap("Segment leaderboard"):
+    seg_leader = leaderboard_segmen(memo.ringkasan_segmen(kunci, df_rfm_seg, "Segment"))
+    st.dataframe(
+        seg_leader.style.format({
+            "Avg_Freq": "{:.2f}",
+            "Avg_Monetary": "Rp {:,.0f}",
+            "Total_Monetary": "Rp {:,.0f}",
+        }),
+        use_container_width=True
+    )
+
+with profil.tahap("Bar chart segment (Plotly)"):
+    import plotly.express as px  # di-import saat bagian chart dirender, bukan saat halaman dibuka
+
+    fig = px.bar(seg_leader, x="Segment", y="Total_Monetary", title="Total Monetary per Segment")
+    fig.update_layout(xaxis_title="Segment", yaxis_title="Total Monetary (Rp)")
+    st.plotly_chart(fig, use_container_width=True)
+
+# =====================
+# Top Customers
+# =====================
+st.markdown("---")
+st.subheader("💰 Top Customers (berdasarkan Monetary)")
+
+top_n = st.number_input("Jumlah Top-N", min_value=5, max_value=500, value=20, step=5)
+
+with profil.tahap("Top customers") as info:
+    df_top = memo.top_customers(kunci, df_rfm_seg, int(top_n), False)
+    st.dataframe(df_top.style.format({"Total_Transaksi": "Rp {:,.0f}"}), use_container_width=True)
+    info["baris_keluar"] = len(df_top)
+
+# =====================
+# Download
+# =====================
+st.markdown("---")
+st.subheader("📥 Download")
+
+label_rentang = f"{mulai:%Y%m%d}_{sampai - pd.Timedelta(days=1):%Y%m%d}"
+tombol_unduh("📥 Download RFM Segmented", df_rfm_seg, f"rfm_gudang_{label_rentang}", (kunci, "rfm_gudang"))
+tombol_unduh(f"📥 Download Top {top_n} Customers", df_top, f"top{top_n}_gudang_{label_rentang}",
+             (kunci, "top_gudang", int(top_n)))
+
+profil.panel("gudang_transaksi")
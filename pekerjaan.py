@@ -0,0 +1,217 @@
+import io
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+
+import cache
+from ingest import baca_transaksi, bersihkan_transaksi, cek_kolom_transaksi
+
+# Runner pekerjaan latar belakang untuk memuat dataset (hash -> baca -> bersihkan -> RFM).
+# Script run Streamlit hanya men-submit pekerjaan lalu selesai, jadi halaman tidak
+# membeku dan rerun karena widget tidak mengulang dari nol. Tiap pekerjaan punya
+# thread sendiri, tapi per session paling banyak MAKS_PEKERJAAN_SESI yang jalan
+# (sisanya antre di slot session itu), jadi upload beruntun dari satu session
+# tidak membuat session lain ikut antre. Flag batal dicek di antara tahap dan di
+# dalam tahap yang berjalan per blok (hash, baca CSV, muat dataset bersama).
+# Tiap tahap menyimpan hasilnya di cache Parquet (cache.py), jadi tahap yang sudah
+# selesai dipakai ulang oleh pekerjaan berikutnya dan oleh halaman lain
+# (mis. hitung_rfm_cached di RFM Analysis / Clustering).
+MAKS_PEKERJAAN_SESI = 1
+
+TAHAP = [
+    ("hash", "Hitung hash file"),
+    ("baca", "Baca CSV"),
+    ("bersihkan", "Bersihkan data"),
+    ("rfm", "Hitung RFM"),
+]
+
+class Dibatalkan(Exception):
+    pass
+
+
+class Pekerjaan:
+    def __init__(self, sumber_id, label):
+        self.id = uuid.uuid4().hex[:8]
+        self.sumber_id = sumber_id      # identitas input (mis. file_id upload), untuk deteksi file baru
+        self.label = label
+        self.status = {tahap: "menunggu" for tahap, _ in TAHAP}
+        self.detik = {}
+        self.hasil = {}
+        self.error = None
+        self._batal = threading.Event()
+        self._thread = None
+
+    def batal(self):
+        # Kooperatif: dicek di antara tahap dan tiap blok di tahap yang dibaca per blok
+        self._batal.set()
+
+    def _cek_batal(self):
+        if self._batal.is_set():
+            raise Dibatalkan()
+
+    @property
+    def selesai(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    @property
+    def dibatalkan(self):
+        return "dibatalkan" in self.status.values()
+
+    @property
+    def berhasil(self):
+        return self.selesai and self.error is None and not self.dibatalkan
+
+    @property
+    def progres(self):
+        beres = sum(s in ("selesai", "cache", "bersama") for s in self.status.values())
+        return beres / len(TAHAP)
+
+    def data_mentah(self):
+        # Hanya untuk ditampilkan di Home, dibaca ulang dari cache kalau sudah dilepas
+        # (None kalau cache-nya sudah dipangkas, lihat cache.pangkas_cache)
+        if "raw" in self.hasil:
+            return self.hasil["raw"]
+        return cache.muat_cache(self.hasil["key"], "raw") if "key" in self.hasil else None
+
+    def tabel_status(self):
+        return pd.DataFrame({
+            "Tahap": [nama for _, nama in TAHAP],
+            "Status": [self.status[tahap] for tahap, _ in TAHAP],
+            "Detik": [round(self.detik[tahap], 2) if tahap in self.detik else None for tahap, _ in TAHAP],
+        })
+
+
+# Tiap tahap: (pekerjaan, sumber) -> True kalau hasilnya diambil dari cache
+def _tahap_hash(job, sumber):
+    job.hasil["key"] = cache.hash_sumber(sumber, job._cek_batal)
+    return False
+
+
+def _tahap_baca(job, sumber):
+    key = job.hasil["key"]
+    df_raw = cache.muat_cache(key, "raw")
+    if df_raw is not None:
+        job.hasil["raw"] = df_raw
+        return True
+    if hasattr(sumber, "seek"):
+        sumber.seek(0)
+    job.hasil["raw"] = baca_transaksi(sumber, cek=job._cek_batal)
+    # Gagal di tahap baca (dan tidak masuk cache) kalau kolom wajib tidak ada
+    cek_kolom_transaksi(job.hasil["raw"])
+    cache.simpan_cache(job.hasil["raw"], key, "raw")
+    return False
+
+
+def _tahap_bersihkan(job, sumber):
+    key = job.hasil["key"]
+    df_clean = cache.muat_cache(key, "bersih")
+    df_laporan = cache.muat_cache(key, "laporan")
+    if df_clean is not None and df_laporan is not None:
+        job.hasil["bersih"], job.hasil["laporan"] = df_clean, df_laporan
+        return True
+    df_clean, laporan = bersihkan_transaksi(job.hasil["raw"])
+    df_laporan = pd.DataFrame({"Alasan": list(laporan), "Jumlah_Baris": list(laporan.values())})
+    cache.simpan_cache(df_clean, key, "bersih")
+    cache.simpan_cache(df_laporan, key, "laporan")
+    job.hasil["bersih"], job.hasil["laporan"] = df_clean, df_laporan
+    return False
+
+
+def _tahap_rfm(job, sumber):
+    # Hasilnya cukup ada di cache Parquet; halaman RFM memuatnya lewat hitung_rfm_cached
+    key = job.hasil["key"]
+    if cache.muat_cache(key, "rfm") is not None:
+        return True
+    cache.hitung_rfm_cached(job.hasil["bersih"], key)
+    return False
+
+
+_FUNGSI_TAHAP = {
+    "hash": _tahap_hash,
+    "baca": _tahap_baca,
+    "bersihkan": _tahap_bersihkan,
+    "rfm": _tahap_rfm,
+}
+
+
+def _tandai_batal(job):
+    for t, _ in TAHAP:
+        if job.status[t] in ("menunggu", "berjalan"):
+            job.status[t] = "dibatalkan"
+    job.hasil.clear()
+
+
+def _jalankan_bersama(job, path):
+    # File di disk server: semua tahap diwakili satu entri per proses (cache.dataset_bersama),
+    # hasilnya DataFrame yang sama untuk semua session
+    mulai = time.perf_counter()
+    for tahap, _ in TAHAP:
+        job.status[tahap] = "berjalan"
+    try:
+        entri = cache.dataset_bersama(path, job._cek_batal)
+    except Dibatalkan:
+        _tandai_batal(job)
+        return
+    except Exception as e:
+        job.status = {tahap: "gagal" for tahap, _ in TAHAP}
+        job.error = str(e)
+        return
+    job.hasil.update({nama: entri[nama] for nama in ("key", "raw", "bersih", "laporan")})
+    job.status = {tahap: "bersama" for tahap, _ in TAHAP}
+    job.detik["hash"] = time.perf_counter() - mulai
+
+
+def _jalankan(job, sumber):
+    tahap = None
+    try:
+        for tahap, _ in TAHAP:
+            job._cek_batal()
+            job.status[tahap] = "berjalan"
+            mulai = time.perf_counter()
+            dari_cache = _FUNGSI_TAHAP[tahap](job, sumber)
+            job.detik[tahap] = time.perf_counter() - mulai
+            job.status[tahap] = "cache" if dari_cache else "selesai"
+        # Data mentah tidak ikut ditahan kalau sudah ada di cache (lihat data_mentah)
+        job.hasil["baris_raw"] = len(job.hasil["raw"])
+        if os.path.exists(cache._cache_path(job.hasil["key"], "raw")):
+            job.hasil.pop("raw")
+    except Dibatalkan:
+        _tandai_batal(job)
+    except Exception as e:
+        job.status[tahap] = "gagal"
+        job.error = str(e)
+
+
+def slot_sesi():
+    # Disimpan di st.session_state, jadi umurnya ikut session
+    return threading.BoundedSemaphore(MAKS_PEKERJAAN_SESI)
+
+
+def _antre(slot, fungsi, job, sumber):
+    # Tunggu slot session; pekerjaan yang dibatalkan selagi antre tidak pernah jalan
+    while not slot.acquire(timeout=0.2):
+        if job._batal.is_set():
+            _tandai_batal(job)
+            return
+    try:
+        fungsi(job, sumber)
+    finally:
+        slot.release()
+
+
+def mulai(sumber, sumber_id, label, slot):
+    # sumber: path file di server (dataset bersama) atau UploadedFile; isi upload disalin
+    # dulu karena objeknya milik script run yang bisa sudah selesai saat thread membacanya.
+    # slot: dari slot_sesi(), satu per session
+    job = Pekerjaan(sumber_id, label)
+    if isinstance(sumber, str):
+        fungsi = _jalankan_bersama
+    else:
+        fungsi, sumber = _jalankan, io.BytesIO(sumber.getvalue())
+    job._thread = threading.Thread(
+        target=_antre, args=(slot, fungsi, job, sumber), name=f"pekerjaan-{job.id}", daemon=True
+    )
+    job._thread.start()
+    return job
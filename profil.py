@@ -0,0 +1,152 @@
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Instrumentasi ringan per tahap: wall time, baris masuk/keluar, selisih memori (RSS).
+# Catatan dikumpulkan per script run (tiap session Streamlit punya thread sendiri)
+# hanya kalau panel performa di sidebar aktif; selain itu bisa dikirim sebagai
+# log terstruktur (satu JSON per baris) lewat logger "profil", mis. PROFIL_LOG=profil.jsonl.
+# Kalau dua-duanya mati, overhead per pemanggilan hanya satu pengecekan.
+_lokal = threading.local()
+log = logging.getLogger("profil")
+
+if os.environ.get("PROFIL_LOG"):
+    _handler = logging.FileHandler(os.environ["PROFIL_LOG"])
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+def _rss_mb():
+    # RSS proses saat ini (Linux); None kalau tidak tersedia
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _jumlah_baris(obj):
+    # DataFrame/Series, atau elemen pertama tuple (mis. distribusi_segmen, cluster_rfm)
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    return None
+
+
+def aktif():
+    return getattr(_lokal, "catatan", None) is not None or log.isEnabledFor(logging.INFO)
+
+
+def mulai(halaman):
+    _lokal.catatan = []
+    _lokal.halaman = halaman
+    _lokal.level = 0
+
+
+def selesai():
+    catatan = getattr(_lokal, "catatan", None)
+    _lokal.catatan = None
+    return catatan
+
+
+@contextlib.contextmanager
+def tahap(nama, baris_masuk=None):
+    # Blok yang diukur bisa mengisi info["baris_keluar"]
+    info = {"baris_keluar": None}
+    if not aktif():
+        yield info
+        return
+
+    level = getattr(_lokal, "level", 0)
+    _lokal.level = level + 1
+    rss_awal = _rss_mb()
+    waktu = time.time()
+    mulai_t = time.perf_counter()
+    try:
+        yield info
+    finally:
+        detik = time.perf_counter() - mulai_t
+        rss_akhir = _rss_mb()
+        _lokal.level = level
+        catat = {
+            "waktu": waktu,
+            "halaman": getattr(_lokal, "halaman", None),
+            "tahap": nama,
+            "level": level,
+            "detik": round(detik, 5),
+            "baris_masuk": baris_masuk,
+            "baris_keluar": info["baris_keluar"],
+            "memori_delta_mb": None if rss_awal is None else round(rss_akhir - rss_awal, 2),
+        }
+        if getattr(_lokal, "catatan", None) is not None:
+            _lokal.catatan.append(catat)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(catat))
+
+
+def instrumen(fn):
+    # Dekorator untuk fungsi Model/ingest: baris masuk = DataFrame/Series pertama di argumen
+    nama = f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not aktif():
+            return fn(*args, **kwargs)
+        masuk = next((len(a) for a in args if isinstance(a, (pd.DataFrame, pd.Series))), None)
+        with tahap(nama, masuk) as info:
+            hasil = fn(*args, **kwargs)
+            info["baris_keluar"] = _jumlah_baris(hasil)
+        return hasil
+
+    return wrapper
+
+
+# Panel "Performa" di sidebar (hanya dipakai di halaman Streamlit)
+def mulai_halaman(halaman):
+    import streamlit as st
+
+    if st.sidebar.checkbox("⏱️ Panel performa", key=f"panel_performa_{halaman}"):
+        mulai(halaman)
+    else:
+        # Bersihkan sisa catatan run sebelumnya (mis. run yang berhenti karena error)
+        selesai()
+
+
+def panel(halaman):
+    import streamlit as st
+
+    catatan = selesai()
+    if catatan is None:
+        return
+
+    # Urut waktu mulai, jadi tahap induk tampil sebelum tahap di dalamnya
+    df = pd.DataFrame(catatan)
+    if not df.empty:
+        df = df.sort_values("waktu", kind="stable")
+    with st.sidebar.expander("⏱️ Performa", expanded=True):
+        if df.empty:
+            st.caption("Tidak ada tahap yang tercatat.")
+            return
+        utama = df[df["level"] == 0]
+        st.caption(f"Total blok halaman: **{utama['detik'].sum():.2f} dtk** ({len(df)} tahap tercatat)")
+        tampil = df.assign(tahap=df["level"].map(lambda x: "· " * x) + df["tahap"].str.replace("Model.", "", regex=False))
+        st.dataframe(
+            tampil[["tahap", "detik", "baris_masuk", "baris_keluar", "memori_delta_mb"]],
+            use_container_width=True, hide_index=True
+        )
+        st.download_button(
+            "📥 Log performa (JSON Lines)",
+            "\n".join(json.dumps(c) for c in catatan),
+            file_name=f"profil_{halaman}.jsonl",
+            mime="application/x-ndjson",
+            key=f"unduh_profil_{halaman}"
+        )
@@ -0,0 +1,185 @@
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from profil import instrumen
+
+# Rekomendasi produk (pengganti hasil_rekomendasi.csv dari notebook [10]).
+# Nama produk di data banyak variannya (promo, flash sale, ejaan Qara'a/Qaraa),
+# jadi dinormalisasi dulu ke katalog: lini (Qaraa PRO / QuranTutor) x paket
+# (Individu / Family) x durasi. Dari situ dibangun matriks sparse customer x produk,
+# top produk per grup (cluster / segment), co-occurrence antar produk, dan
+# "next best product" per customer yang dihitung sekali lalu tinggal di-lookup.
+# Durasi disimpan dalam hari supaya produk trial/voucher harian ("3 Hari") punya
+# bucket sendiri, tidak tercampur dengan paket berbayar tanpa durasi.
+# 1 bulan = 30, 1 tahun = 360 hari: "12 Bulan" tetap satu bucket dengan "1 Tahun"
+_DURASI = re.compile(r"(\d+)\s*(hari|days|day|bulan|months|month|tahun|years|year)\b")
+_HARI_PER_SATUAN = {
+    "hari": 1, "day": 1, "days": 1,
+    "bulan": 30, "month": 30, "months": 30,
+    "tahun": 360, "year": 360, "years": 360,
+}
+
+
+def _label_durasi(hari):
+    if hari is None:
+        return ""
+    if hari % 360 == 0:
+        return f"{hari // 360} Tahun"
+    if hari % 30 == 0:
+        return f"{hari // 30} Bulan"
+    return f"{hari} Hari"
+
+
+def normalisasi_produk(nama):
+    # "Flash Sale Ramadhan 1 Tahun" -> ("Qaraa PRO", "Individu", 360)
+    teks = str(nama).lower().replace("’", "'")
+    lini = "QuranTutor" if "qurantutor" in teks else "Qaraa PRO"
+    paket = "Family" if "family" in teks else "Individu"
+    cocok = _DURASI.search(teks)
+    durasi = int(cocok.group(1)) * _HARI_PER_SATUAN[cocok.group(2)] if cocok else None
+    return lini, paket, durasi
+
+
+@instrumen
+def katalog_produk(nama_produk):
+    # Dipetakan per nama unik (puluhan), bukan per baris transaksi
+    unik = pd.Index(pd.unique(pd.Series(nama_produk).astype(str)))
+    baris = [normalisasi_produk(n) for n in unik]
+    katalog = pd.DataFrame(baris, columns=["Lini", "Paket", "Durasi_Hari"], index=unik)
+    katalog["Produk"] = [
+        " ".join(x for x in [lini, "Family" if paket == "Family" else "", _label_durasi(durasi)] if x)
+        for lini, paket, durasi in baris
+    ]
+    katalog["Durasi_Hari"] = katalog["Durasi_Hari"].astype("Int64")
+    return katalog.rename_axis("Product_Name").reset_index()
+
+
+class Rekomendasi:
+    # Semua hasil disimpan sebagai array; lookup per customer = get_indexer + take
+    def __init__(self, customer, produk, next_best, skor, top_grup, cooccurrence):
+        self.customer = customer            # pd.Index Customer_id (urutan baris matriks)
+        self.produk = produk                # np.array nama produk katalog
+        self.next_best = next_best          # int32 (n_customer, k), -1 = tidak ada
+        self.skor = skor                    # float32 (n_customer, k)
+        self.top_grup = top_grup            # DataFrame top produk per grup
+        self.cooccurrence = cooccurrence    # DataFrame produk x produk (jumlah customer)
+        self._semua = None
+
+    def untuk(self, customer_ids):
+        posisi = self.customer.get_indexer(pd.Index(customer_ids))
+        ada = posisi >= 0
+        k = self.next_best.shape[1]
+        kode = np.full((len(posisi), k), -1, dtype=np.int32)
+        skor = np.zeros((len(posisi), k), dtype=np.float32)
+        kode[ada] = self.next_best[posisi[ada]]
+        skor[ada] = self.skor[posisi[ada]]
+
+        nama = np.append(self.produk, None)  # kode -1 -> None
+        hasil = pd.DataFrame({"Customer_id": list(customer_ids)})
+        for i in range(k):
+            hasil[f"Rekomendasi_{i + 1}"] = nama[kode[:, i]]
+            hasil[f"Skor_{i + 1}"] = skor[:, i].round(3)
+        return hasil
+
+    def semua(self):
+        # Tabel untuk semua customer, dibuat sekali (dipakai untuk unduhan)
+        if self._semua is None:
+            self._semua = self.untuk(self.customer)
+        return self._semua
+
+
+def _matriks(df_clean, katalog):
+    kode_c, customer = pd.factorize(df_clean["Customer_id"], sort=True)
+    # Nama produk -> produk katalog lewat kode nama unik (tanpa map string per baris)
+    kode_nama, nama = pd.factorize(df_clean["Product_Name"])
+    peta = dict(zip(katalog["Product_Name"], katalog["Produk"]))
+    kode_unik, produk = pd.factorize(pd.Series(np.asarray(nama).astype(str)).map(peta), sort=True)
+    kode_p = kode_unik[kode_nama]
+    nilai = df_clean["Total_Transaksi"].to_numpy(dtype="float64")
+    m = sparse.csr_matrix((nilai, (kode_c, kode_p)), shape=(len(customer), len(produk)))
+    m.sum_duplicates()
+    return m, pd.Index(customer, name="Customer_id"), np.asarray(produk, dtype=object)
+
+
+def _top_grup(m, grup, produk, n):
+    # Matriks indikator grup x customer dikali matriks customer x produk -> total per grup
+    kode_g, label_g = pd.factorize(grup, sort=True)
+    ada = kode_g >= 0
+    indikator = sparse.csr_matrix(
+        (np.ones(ada.sum()), (kode_g[ada], np.flatnonzero(ada))), shape=(len(label_g), m.shape[0])
+    )
+    total = np.asarray((indikator @ m).todense())
+    pembeli = np.asarray((indikator @ (m > 0).astype(np.float64)).todense())
+
+    baris = []
+    for g, label in enumerate(label_g):
+        urut = np.argsort(-total[g], kind="stable")[:n]
+        for rank, p in enumerate(urut, start=1):
+            if total[g, p] <= 0:
+                break
+            baris.append((label, rank, produk[p], total[g, p], int(pembeli[g, p])))
+    top = pd.DataFrame(baris, columns=["Grup", "Rank", "Produk", "Total_Transaksi", "Jumlah_Customer"])
+    return top, total, kode_g
+
+
+def _masker_varian(katalog_produk_unik):
+    # Jangan rekomendasikan durasi yang sama / lebih pendek di lini+paket yang sudah dimiliki
+    # (mis. punya Qaraa PRO 1 Tahun -> Qaraa PRO 1 Bulan tidak direkomendasikan)
+    lini_paket = pd.factorize(katalog_produk_unik["Lini"] + "|" + katalog_produk_unik["Paket"])[0]
+    durasi = katalog_produk_unik["Durasi_Hari"].fillna(0).to_numpy(dtype=np.int64)
+    # blokir[i, j] = punya i -> jangan rekomendasikan j
+    blokir = (lini_paket[:, None] == lini_paket[None, :]) & (durasi[None, :] <= durasi[:, None])
+    return sparse.csr_matrix(blokir.astype(np.float64))
+
+
+@instrumen
+def bangun_rekomendasi(df_clean, grup=None, k=3, n_top=5, bobot_populer=0.3, chunk=200_000):
+    # grup: Series label per Customer_id (Cluster / Segment); None = satu grup "Semua"
+    katalog = katalog_produk(pd.unique(df_clean["Product_Name"]))
+    m, customer, produk = _matriks(df_clean, katalog)
+
+    if grup is None:
+        label = np.full(len(customer), "Semua", dtype=object)
+    else:
+        label = pd.Series(grup).reindex(customer).to_numpy(dtype=object)
+    top_grup, total_grup, kode_g = _top_grup(m, label, produk, n_top)
+
+    # Co-occurrence: berapa customer yang membeli produk i dan j
+    b = (m > 0).astype(np.float32)
+    cooc = np.asarray((b.T @ b).todense())
+    cooccurrence = pd.DataFrame(cooc.astype(np.int64), index=produk, columns=produk)
+
+    # Confidence i -> j = P(beli j | beli i); diagonal 0 (bukan rekomendasi)
+    dibeli = np.diag(cooc).copy()
+    confidence = np.divide(cooc, dibeli[:, None], out=np.zeros_like(cooc), where=dibeli[:, None] > 0)
+    np.fill_diagonal(confidence, 0)
+
+    # Popularitas produk di grup customer (share nilai transaksi), dipakai sebagai prior
+    share = total_grup / np.maximum(total_grup.sum(axis=1, keepdims=True), 1)
+    info_produk = katalog.drop_duplicates("Produk").set_index("Produk").loc[produk].reset_index()
+    blokir = _masker_varian(info_produk)
+
+    k = min(k, len(produk))
+    next_best = np.full((len(customer), k), -1, dtype=np.int32)
+    skor_top = np.zeros((len(customer), k), dtype=np.float32)
+
+    # Diproses per chunk customer supaya matriks skor dense tetap kecil
+    for awal in range(0, len(customer), chunk):
+        blok = b[awal:awal + chunk]
+        skor = np.asarray(blok @ confidence, dtype=np.float32)
+        g = kode_g[awal:awal + chunk]
+        skor += bobot_populer * np.where(g[:, None] >= 0, share[np.maximum(g, 0)], 0).astype(np.float32)
+        # Produk yang sudah dibeli / varian yang lebih pendek dari yang dimiliki tidak direkomendasikan
+        dilarang = (blok @ blokir).toarray() > 0
+        skor[dilarang] = -np.inf
+
+        urut = np.argsort(-skor, axis=1, kind="stable")[:, :k]
+        nilai = np.take_along_axis(skor, urut, axis=1)
+        valid = np.isfinite(nilai) & (nilai > 0)
+        next_best[awal:awal + chunk] = np.where(valid, urut, -1)
+        skor_top[awal:awal + chunk] = np.where(valid, nilai, 0)
+
+    return Rekomendasi(customer, produk, next_best, skor_top, top_grup, cooccurrence)
@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from ingest import muat_transaksi, parse_rupiah
+
+HEADER = "Customer_name,Customer_id,Order_id,Product_code,Product_Name,Quantity,Order_date,Price\n"
+
+
+def test_parse_rupiah_format():
+    hasil = parse_rupiah(pd.Series(["Rp300.000", "Rp12.500,50", None, "Rp300.000"]))
+    np.testing.assert_array_equal(hasil.to_numpy(), [300000.0, 12500.5, np.nan, 300000.0])
+
+
+def test_parse_rupiah_semua_kosong():
+    harga = pd.Series([np.nan, None], index=[5, 7], name="Price", dtype=object)
+    hasil = parse_rupiah(harga)
+    assert hasil.dtype == "float64"
+    assert hasil.isna().all()
+    assert list(hasil.index) == [5, 7]
+    assert hasil.name == "Price"
+
+
+def test_muat_transaksi_harga_kosong():
+    csv = HEADER + "Riya,1473989,V-1,131,Qaraa PRO 1 Bulan,1,2025-01-01 0:42:25,\n"
+    df_raw, df_clean, laporan = muat_transaksi(io.BytesIO(csv.encode()))
+    assert len(df_raw) == 1
+    assert len(df_clean) == 0
@@ -0,0 +1,176 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Model
+from ingest import muat_transaksi
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets",
+                       "DATASET PT. KREASI PUTRA HOTAMA 2025 - hasil_merge.csv")
+
+
+@pytest.fixture(scope="module")
+def df_clean():
+    _, df_clean, _ = muat_transaksi(DATASET)
+    return df_clean
+
+
+def _per_customer(df):
+    return df.sort_values("Customer_id").reset_index(drop=True)
+
+
+def test_rfm_state_per_chunk_sama_dengan_hitung_rfm(df_clean):
+    state = None
+    for idx in np.array_split(np.arange(len(df_clean)), 7):
+        state = Model.perbarui_rfm_state(state, df_clean.iloc[idx])
+    pd.testing.assert_frame_equal(
+        _per_customer(Model.rfm_dari_state(state)), _per_customer(Model._hitung_rfm(df_clean))
+    )
+
+
+def test_rfm_state_stream_simpan_muat(tmp_path):
+    # Alur batch.py --inkremental: file lama -> state di disk -> file baru di-fold ke state yang dimuat
+    raw = pd.read_csv(DATASET)
+    # Dipotong di baris ber-Order_id: ffill Order_id tidak menyambung antar file
+    potong = raw.index[raw["Order_id"].notna()][800]
+    lama, baru = tmp_path / "lama.csv", tmp_path / "baru.csv"
+    raw.iloc[:potong].to_csv(lama, index=False)
+    raw.iloc[potong:].to_csv(baru, index=False)
+    path = tmp_path / "rfm_state.csv"
+
+    r = Model.bersihkan_data_stream(lama, chunksize=300, rfm_state=Model.StateRFM())
+    Model.simpan_rfm_state(r["rfm_state"], path)
+    state = Model.muat_rfm_state(path)
+    Model.bersihkan_data_stream(baru, chunksize=300, rfm_state=state)
+
+    pd.testing.assert_frame_equal(
+        _per_customer(Model.rfm_dari_state(state)), _per_customer(Model._hitung_rfm(Model._bersihkan(raw)))
+    )
+
+
+def test_snapshot_terakhir_sama_dengan_hitung_rfm(df_clean):
+    df_snap = Model.hitung_rfm_snapshot(df_clean)
+    terakhir = df_snap[df_snap["Snapshot"] == df_snap["Snapshot"].max()].drop(columns="Snapshot")
+    pd.testing.assert_frame_equal(_per_customer(terakhir), _per_customer(Model._hitung_rfm(df_clean)))
+
+
+def test_snapshot_tiap_tanggal_sama_dengan_hitung_rfm_terpotong(df_clean):
+    ref_dates = Model.tanggal_snapshot_bulanan(df_clean)
+    df_snap = Model.hitung_rfm_snapshot(df_clean, ref_dates)
+    for ref in ref_dates[::3]:
+        sampai = df_clean[df_clean["Order_date"] <= ref]
+        harapan = Model._hitung_rfm(sampai)
+        harapan["Recency"] = (ref - harapan["Last_Order_Date"]).dt.days
+        hasil = df_snap[df_snap["Snapshot"] == ref].drop(columns="Snapshot")
+        pd.testing.assert_frame_equal(_per_customer(hasil), _per_customer(harapan))
+
+
+def _cari_scan(ids, names, q):
+    # Acuan: str.contains di ID atau nama (lowercase), seperti pencarian sebelum ada index
+    q = q.strip().lower()
+    cocok = (pd.Series(ids).astype(str).str.lower().str.contains(q, regex=False)
+             | pd.Series(names).astype(str).str.lower().str.contains(q, regex=False))
+    return np.flatnonzero(cocok.to_numpy())
+
+
+def test_index_pencarian_sama_dengan_scan():
+    rng = np.random.default_rng(0)
+    huruf = list("abcdeé ") + ["Ä"]
+    names = ["".join(rng.choice(huruf, rng.integers(0, 12))) for _ in range(3000)] + [None, "Riya", "  "]
+    ids = rng.integers(1, 100_000, len(names))
+    index = Model.IndexPencarian(ids, names)
+
+    queries = ["a", "É", "ab", "a b", "abc", "deea", " ä", "12", "123", "99", "zz", "xyz", "nan", "riya", "ab1"]
+    queries += [names[i][1:5] for i in range(0, 3000, 97) if len(names[i]) > 5]
+    for q in queries:
+        np.testing.assert_array_equal(index.cari(q), _cari_scan(ids, names, q), err_msg=repr(q))
+    np.testing.assert_array_equal(index.cari("  "), np.arange(len(names)))
+    assert len(index.cari("\x01")) == 0
+
+
+def test_merge_transaksi_overlap_dan_dtype(tmp_path):
+    kolom = "Order_id,Product_code,Product_Name,Quantity,Order_date,Price"
+    jan = tmp_path / "data_jan.csv"
+    jan.write_text(
+        f"Customer_id,{kolom}\n"
+        "7,A1,131,Kaos,2,2025-01-01 0:42:25,Rp10.000\n"
+        "8,A2,132,Topi,1,2025-01-02 10:00:00,Rp50.000\n"
+        "9,A3,133,Tas,1,2025-01-03 11:00:00,Rp20.000\n"
+        "9,A3,133,Tas,1,2025-01-03 11:00:00,Rp20.000\n"
+    )
+    feb = tmp_path / "data_feb.csv"
+    feb.write_text(
+        f"Customer_id,{kolom}\n"
+        "8,A2,132,Topi,1,2025-01-02 10:00:00,Rp50.000\n"
+        "10,A4,131,Kaos,3,2025-02-01 09:00:00,Rp10.000\n"
+    )
+    nama = tmp_path / "data2.csv"
+    nama.write_text(
+        f"Customer_name,{kolom}\n"
+        "Riya,A1,131,Kaos,2.0,2025-01-01 00:42:25,10000\n"
+        "Budi,A2,132,Topi,1,2025-01-02 10:00:00,Rp 50.000\n"
+        "Siti,A3,133,Tas,1,2025-01-03 11:00:00,Rp20.000\n"
+        "Siti,A3,133,Tas,1,2025-01-03 11:00:00,Rp20.000\n"
+        "Ahmad,A4,131,Kaos,3,2025-02-01 09:00:00,Rp10.000\n"
+    )
+    df, laporan, df_tidak_cocok = Model.merge_transaksi([jan, feb], [nama])
+
+    # Baris A2 muncul di dua export -> dibuang sekali; baris kembar A3 dalam satu file tetap dua
+    assert laporan["duplikat_id"] == 1
+    assert laporan["baris_merge"] == 5
+    assert laporan["hit_rate_id"] == laporan["hit_rate_nama"] == 1.0
+    assert df_tidak_cocok.empty
+    assert df["Customer_id"].dtype == "int64"
+    assert df["Quantity"].dtype == "int64"
+    hasil = df.sort_values(["Order_id", "Customer_id"])
+    assert hasil["Customer_id"].tolist() == [7, 8, 9, 9, 10]
+    assert hasil["Customer_name"].tolist() == ["Riya", "Budi", "Siti", "Siti", "Ahmad"]
+
+
+def test_kolom_wajib_hilang_pesan_terbaca(tmp_path):
+    path = tmp_path / "tanpa_harga.csv"
+    pd.read_csv(DATASET, nrows=50).drop(columns="Price").to_csv(path, index=False)
+    with pytest.raises(ValueError, match="kolom Price tidak ditemukan"):
+        muat_transaksi(path)
+
+
+def _galat_rank(x, batas, q):
+    # Jarak q ke rentang rank batas hasil sketsa (nilai kembar punya rentang rank, bukan satu titik)
+    x = np.sort(x)
+    kiri = np.searchsorted(x, batas, side="left") / len(x)
+    kanan = np.searchsorted(x, batas, side="right") / len(x)
+    return np.maximum(kiri - q, 0) + np.maximum(q - kanan, 0)
+
+
+def test_sketsa_kuantil_dekat_kuantil_eksak():
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(10, 1.5, 300_000)
+    q = np.arange(1, Model.N_SKOR) / Model.N_SKOR
+    assert _galat_rank(x, Model.SketsaKuantil().tambah(x).kuantil(q), q).max() < 0.005
+
+    # Digabung dari beberapa chunk -> akurasi setara
+    sketsa = [Model.SketsaKuantil().tambah(potong) for potong in np.array_split(x, 7)]
+    for s in sketsa[1:]:
+        sketsa[0].gabung(s)
+    assert _galat_rank(x, sketsa[0].kuantil(q), q).max() < 0.005
+
+
+def test_sketsa_kuantil_nilai_diskret_eksak():
+    # Frequency: banyak nilai kembar -> batas sama persis dengan kuantil eksak
+    rng = np.random.default_rng(1)
+    f = rng.geometric(0.5, 200_000).astype("float64")
+    q = np.arange(1, Model.N_SKOR) / Model.N_SKOR
+    np.testing.assert_array_equal(Model.SketsaKuantil().tambah(f).kuantil(q), np.quantile(f, q))
+
+
+def test_batas_skor_rfm_per_chunk(df_clean):
+    df_rfm = Model._hitung_rfm(df_clean)
+    utuh = Model.batas_skor_rfm(df_rfm)
+    per_chunk = Model.batas_skor_rfm(df_rfm.iloc[i:i + 300] for i in range(0, len(df_rfm), 300))
+    q = np.arange(1, Model.N_SKOR) / Model.N_SKOR
+    for kol in Model.KOLOM_SKOR:
+        x = df_rfm[kol].to_numpy(dtype="float64")
+        assert _galat_rank(x, utuh[kol], q).max() < 0.01, kol
+        assert _galat_rank(x, per_chunk[kol], q).max() < 0.01, kol